@@ -1,9 +1,11 @@
 import cv2
 import numpy as np
-from ultralytics import YOLO
 from pathlib import Path
 import os
 
+from vision.model_pool import get_pool
+from vision.zone_raster import ZoneRaster
+
 ZONE_FILE = "zones.npy"
 
 # Safe load
@@ -40,13 +42,11 @@ def draw_existing_zones(frame):
     if current_zone:
         cv2.rectangle(frame, current_zone[0], current_zone[1], (0, 200, 255), 2)
 
-def point_in_zone(point, zone):
-    x1, y1 = zone[0]
-    x2, y2 = zone[1]
-    return x1 <= point[0] <= x2 and y1 <= point[1] <= y2
+# zones rasterized once into a label image; rebuilt only when they change
+raster = None
 
 # ------------------- YOLO MODEL -------------------
-model = YOLO("yolov8n.pt")
+model = get_pool("yolov8n.pt") # shared inference workers (model_pool.py)
 
 # ------------------- VIDEO LOOP -------------------
 cap = cv2.VideoCapture("Pedestrians Detection Dataset.mp4")
@@ -58,12 +58,14 @@ while True:
     if not ret:
         break
 
-    results = model(frame, verbose=False)
-    detection_data = results[0].boxes.data.cpu().numpy()
+    detection_data = model.predict([frame])[0]
 
     draw_existing_zones(frame)
 
-    zone_counts = [0 for _ in range(len(zones))]
+    if raster is None:
+        raster = ZoneRaster(frame.shape)
+    raster.compile(zones)
+    centroids = []
 
     for idx, det in enumerate(detection_data):
         x1, y1, x2, y2, conf, cls = det
@@ -77,9 +79,9 @@ while True:
                     cv2.FONT_HERSHEY_SIMPLEX, 1, (0,255,0), 2)
         cv2.circle(frame, (cx, cy), 5, (255, 255, 255), -1)
 
-        for i, zone in enumerate(zones):
-            if point_in_zone((cx, cy), zone):
-                zone_counts[i] += 1
+        centroids.append((cx, cy))
+
+    zone_counts = raster.counts(centroids).tolist()
 
     # show counts
     y_offset = 40
@@ -0,0 +1,72 @@
+# alerts.py
+# Debounced per-zone threshold alerts: a zone has to stay over its threshold
+# for min_duration seconds to raise an alert, and drop more than `hysteresis`
+# below it for min_duration seconds to clear it, so a count hovering at the
+# threshold doesn't flap. One event per transition.
+import threading
+import time
+
+CLEAR, PENDING_ON, ALERT, PENDING_OFF = "clear", "pending_on", "alert", "pending_off"
+
+
+class AlertEngine:
+    def __init__(self, hysteresis=1, min_duration=2.0, clock=time.monotonic):
+        self.hysteresis = hysteresis
+        self.min_duration = min_duration
+        self.clock = clock
+        self.states = {} # (camera, zone, threshold) -> [state, since]
+        # cameras update from their own threads while requests read active()
+        self.lock = threading.Lock()
+
+    def update(self, camera, zone_counts, thresholds, now=None):
+        """
+        zone_counts: {zone: count} for this frame
+        thresholds: [{"zone": name, "value": n}, ...]
+        Returns the transitions that happened, as dicts with state "on" or "off".
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            events = []
+            seen = set()
+            for t in thresholds:
+                zone, value = t["zone"], t["value"]
+                if zone not in zone_counts:
+                    continue
+                key = (camera, zone, value)
+                seen.add(key)
+                count = zone_counts[zone]
+                st = self.states.setdefault(key, [CLEAR, now])
+                state, since = st
+
+                if state in (CLEAR, PENDING_ON):
+                    if count >= value:
+                        if state == CLEAR:
+                            st[:] = [PENDING_ON, now]
+                        if now - st[1] >= self.min_duration:
+                            st[:] = [ALERT, now]
+                            events.append(self._event(camera, zone, value, count, "on"))
+                    else:
+                        st[:] = [CLEAR, now]
+                else:
+                    if count < value - self.hysteresis:
+                        if state == ALERT:
+                            st[:] = [PENDING_OFF, now]
+                        if now - st[1] >= self.min_duration:
+                            st[:] = [CLEAR, now]
+                            events.append(self._event(camera, zone, value, count, "off"))
+                    else:
+                        st[:] = [ALERT, since if state == ALERT else now]
+
+            # thresholds or zones that were removed stop alerting silently
+            for key in [k for k in self.states if k[0] == camera and k not in seen]:
+                del self.states[key]
+            return events
+
+    def _event(self, camera, zone, value, count, state):
+        return {"camera": camera, "zone": zone, "threshold": value, "count": count, "state": state}
+
+    def active(self, camera=None):
+        """Zones currently in alert (pending_off still counts as alerting)."""
+        with self.lock:
+            return {k[1] for k, (state, _) in self.states.items()
+                    if state in (ALERT, PENDING_OFF) and (camera is None or k[0] == camera)}
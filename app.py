@@ -1,19 +1,34 @@
 import cv2, csv
 import os
+import sys
+import threading
 
 from datetime import datetime
 from flask import Flask, render_template, request, redirect, session, Response, jsonify, send_file, url_for
 
+from vision.backends import BACKENDS
 from vision.detector import PersonDetector
+from vision.model_pool import pools
 from vision.tracker import SimpleTracker
 from vision.heatmap import HeatMap
+from vision.pipeline import FramePipeline
+from vision.broadcaster import FrameBroadcaster
+from vision.camera_worker import CameraProcess, draw_annotations
+from vision.jpeg_tiers import encode_tiers, parse_tier
+from vision.batch_scheduler import BatchScheduler
+from vision.zone_raster import ZoneRaster, bits_to_membership, zone_name, zone_polygon
+from vision.roi import ROIDetector
+from vision.motion import MotionPredictor
+from vision.events import EventHub, DeltaPublisher
+from vision.alerts import AlertEngine
+from vision.metrics import FpsMeter, STREAM_CLIENTS, STORE_ITEMS, render as render_metrics
 
 from models.camera_model import Camera
 from models.zone_model import zones, save_zones
 from models.count_model import counts
 from models.threshold_model import thresholds
 
-from models.log_model import logs , add_alert
+from models.log_model import logs , add_alert, enable_persistence
 
 app = Flask(__name__)
 app.secret_key = "milestone4_admin"
@@ -21,101 +36,263 @@ app.secret_key = "milestone4_admin"
 # ---------------- DATA ----------------
 cameras = []
 active_camera =None
-cap=None
 # ----------------------
 # ALERTS & THRESHOLDS
 # ----------------------
 alerts = [] # Stores alert events
 thresholds_dict = {} # Admin-set limits per zone
+# one alert per threshold crossing, not one per frame
+alert_engine = AlertEngine(hysteresis=1, min_duration=2.0)
+enable_persistence("data/alerts.jsonl")
 
 
 # ---------------- VISION ----------------
-detector = PersonDetector()
-tracker = SimpleTracker()
-heatmap = None
-
-def generate_frames():
-    global heatmap, cap
-
-    if cap is None:
-            return
-    while True:
-        ret,frame=cap.read()
-        if not ret:       
-
-            break
-
-        if heatmap is None:
-            heatmap = HeatMap(frame.shape)
-
-        boxes = detector.detect(frame)
-        objects = tracker.update(boxes)
-
-        counts.clear()
-        for obj_id, (cx, cy) in objects.items():
-            counts.append(type('Obj', (), {
-                'id': obj_id,
-                'zone': 'N/A',
-                'time': datetime.now()
-            }))
-
-        for (x1, y1, x2, y2) in boxes:
-            cv2.rectangle(frame, (x1,y1), (x2,y2), (255,0,0), 2)
-
-        for obj_id, (cx, cy) in objects.items():
-            cv2.circle(frame, (cx,cy), 4, (0,255,0), -1)
-            cv2.putText(frame, f"ID {obj_id}", (cx+5, cy-5),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 2)
-
-        for z in zones:
-            coords = z.get("coords", [])
-            if len(coords) == 2:
-                cv2.rectangle(frame, coords[0], coords[1], (0,0,255), 2)
-
-        for t in thresholds:
-            for z in zones:
-             if z['name'] == t['zone']:
-                coords = z['coords']
-             if len(coords) == 2:
-                x1, y1 = coords[0]
-                x2, y2 = coords[1]
-
-                count_inside = sum(
-                    1 for _, (cx, cy) in objects.items()
-                    if x1 <= cx <= x2 and y1 <= cy <= y2
-                )
-
-                if count_inside >= t['value']:
-                    cv2.putText(
-                        frame,
-                        f"ALERT {z['name']}!",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 0, 255),
-                        2
-                    )
-
-                    logs.append({
-                        "message": f"Threshold exceeded in {z['name']}",
-                        "time": datetime.now()
-                    })
-         # Draw zones + check thresholds
-        for z in zones:
-            coords = z.get('coords',[])
-            if len(coords)==2:
-                x1,y1 = coords[0]
-                x2,y2 = coords[1]
-                cv2.rectangle(frame, coords[0], coords[1], (0,0,255),2)
-                cv2.putText(frame, z.get('name','Zone'), (x1,y1-5),
-                            cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
-
-        heatmap.update(objects)
-        frame = heatmap.draw(frame)
-
-        ret, buffer = cv2.imencode(".jpg", frame)
-        frame = buffer.tobytes()
+DEFAULT_BACKEND = "torch" # "torch", "onnx", "onnx-int8" or "openvino"
+ROI_INFERENCE = True # only run the detector on the (padded) zone areas
+# True: every camera is analyzed in its own supervised worker process;
+# False: in threads of this process, batching frames across cameras
+CAMERA_PROCESSES = True
+CAMERA_INFER_THREADS = None # torch/ONNX threads per camera process; None: split the cores evenly
+schedulers = {} # backend -> BatchScheduler shared by the cameras using it
+roi_detectors = []
+
+def get_scheduler(backend):
+    # frames from all cameras on the same backend share one batched forward pass
+    if backend not in schedulers:
+        detector = PersonDetector(backend=backend, calib_sources=[c.source for c in cameras])
+        detect_batch = detector.detect_batch
+        if ROI_INFERENCE:
+            roi_detector = ROIDetector(detector.detect_batch, margin=32)
+            roi_detector.set_regions([zone_polygon(z) for z in zones])
+            roi_detectors.append(roi_detector)
+            detect_batch = roi_detector.detect_batch
+        schedulers[backend] = BatchScheduler(detect_batch).start()
+    return schedulers[backend]
+
+def update_regions():
+    for roi_detector in roi_detectors:
+        roi_detector.set_regions([zone_polygon(z) for z in zones])
+    for feed in feeds.values():
+        feed.update_zones(zones)
+
+if not CAMERA_PROCESSES:
+    get_scheduler(DEFAULT_BACKEND) # returns at once, the model loads and warms up in the background (/ready)
+feeds = {} # camera name -> CameraFeed / ProcessCameraFeed
+PIPELINE_QUEUE_SIZE = 2
+DETECT_EVERY = 3 # run the detector on every k-th frame, predict tracks in between
+
+class CameraFeed:
+    """One analysis loop per camera; its JPEGs are shared by every viewer."""
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.cap = cv2.VideoCapture(camera.source)
+        self.scheduler = get_scheduler(camera.backend)
+        self.tracker = SimpleTracker()
+        self.heatmap = None
+        self.raster = None
+        self.motion = MotionPredictor()
+        self.since_detect = DETECT_EVERY # force a detection on the first frame
+        self.broadcaster = FrameBroadcaster()
+        # capture -> detect -> track/draw -> encode, each in its own thread
+        self.pipeline = FramePipeline(self.cap, [
+            ("detect", self.detect_stage),
+            ("track", self.track_stage),
+            ("encode", self.encode_stage),
+        ], maxsize=PIPELINE_QUEUE_SIZE, name=camera.name)
+        self.fps = FpsMeter(camera.name)
+        self.deltas = DeltaPublisher(events, camera.name)
+        self.first_frame = threading.Event()
+        self.thread = None
+
+    def detect_stage(self, frame):
+        if self.heatmap is None:
+            self.heatmap = HeatMap(frame.shape)
+            self.raster = ZoneRaster(frame.shape)
+        if self.since_detect + 1 < DETECT_EVERY:
+            self.since_detect += 1
+            return frame, None
+        boxes = self.scheduler.detect(self.camera.name, frame)
+        if boxes is None:
+            return None # superseded by a newer frame from this camera
+        self.since_detect = 0
+        return frame, boxes
+
+    def track_stage(self, item):
+        frame, boxes = item
+        self.fps.tick()
+        if boxes is not None:
+            objects = self.tracker.update(boxes)
+            self.motion.observe(self.tracker.boxes)
+        else:
+            # between keyframes: carry the tracks forward at constant velocity
+            predicted = self.motion.predict()
+            boxes = list(predicted.values())
+            objects = {i: ((x1+x2)//2, (y1+y2)//2) for i, (x1, y1, x2, y2) in predicted.items()}
+
+        # zones are only re-rasterized when the zone list changes
+        self.raster.compile(zones)
+        inside = self.raster.membership(list(objects.values()))
+        counts.record(self.camera.name, list(objects.keys()), inside, self.raster.names)
+        zone_counts = dict(zip(self.raster.names, inside.sum(axis=0).tolist()))
+        self.deltas.update(dict(zone_counts, All=len(objects)))
+        publish_transitions(self.camera.name, zone_counts)
+
+        draw_annotations(frame, boxes, objects, self.raster, alert_engine.active(self.camera.name))
+        self.heatmap.update(objects)
+        self.first_frame.set()
+        return self.heatmap.draw(frame)
+
+    def encode_stage(self, frame):
+        # one encode per watched tier, shared by all of its clients
+        tiers = self.broadcaster.watched()
+        if not tiers:
+            return None
+        return encode_tiers(frame, tiers)
+
+    def run(self):
+        self.scheduler.register(self.camera.name)
+        self.pipeline.start()
+        try:
+            for jpeg in self.pipeline.frames():
+                self.broadcaster.publish(jpeg)
+        finally:
+            self.pipeline.stop()
+            self.scheduler.unregister(self.camera.name)
+            self.broadcaster.close()
+            self.cap.release()
+
+    def start(self):
+        STREAM_CLIENTS.set_function(lambda: self.broadcaster.clients, camera=self.camera.name)
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.pipeline.stop()
+        STREAM_CLIENTS.remove(camera=self.camera.name)
+
+    def update_zones(self, zones):
+        pass # read from the shared zone list on every frame
+
+    def get_stats(self):
+        return self.pipeline.get_stats()
+
+
+def camera_threads():
+    # N camera processes each running a full-width thread pool oversubscribe the cores
+    return max(1, (os.cpu_count() or 1) // max(1, len(cameras)))
+
+
+class ProcessCameraFeed:
+    """
+    The camera is analyzed in a worker process (camera_worker.py), which also
+    encodes the watched stream tiers; this side only reads its results and
+    JPEGs from shared memory and keeps the alert state and observation log.
+    """
+
+    def __init__(self, camera):
+        self.camera = camera
+        self.worker = CameraProcess(camera.name, camera.source, camera.backend, zones,
+                                    detect_every=DETECT_EVERY, roi=ROI_INFERENCE,
+                                    threads=CAMERA_INFER_THREADS or camera_threads())
+        self.broadcaster = FrameBroadcaster()
+        self.fps = FpsMeter(camera.name)
+        self.deltas = DeltaPublisher(events, camera.name)
+        self.active = set()
+        self.tiers = []
+        self.first_frame = threading.Event()
+        self.thread = None
+
+    def on_result(self, result, jpegs):
+        self.fps.tick()
+        self.first_frame.set()
+        names = list(result["names"])
+        inside = bits_to_membership(result["bits"], len(names))
+        counts.record(self.camera.name, result["ids"], inside, names)
+        zone_counts = result["counts"]
+        self.deltas.update(dict(zone_counts, All=len(result["ids"])))
+        publish_transitions(self.camera.name, zone_counts)
+
+        active = alert_engine.active(self.camera.name)
+        if active != self.active:
+            self.active = active
+            self.worker.send("alerts", sorted(active)) # drawn by the worker
+
+        tiers = sorted(self.broadcaster.watched())
+        if tiers != self.tiers:
+            self.tiers = tiers
+            self.worker.send("tiers", tiers) # encoded by the worker from its next frame on
+        if jpegs:
+            self.broadcaster.publish(jpegs)
+
+    def run(self):
+        try:
+            self.worker.relay(self.on_result)
+        finally:
+            self.broadcaster.close()
+
+    def start(self):
+        STREAM_CLIENTS.set_function(lambda: self.broadcaster.clients, camera=self.camera.name)
+        self.worker.start()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.worker.stop()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+        self.worker.close()
+        STREAM_CLIENTS.remove(camera=self.camera.name)
+
+    def update_zones(self, zones):
+        self.worker.send("zones", zones)
+
+    def get_stats(self):
+        return self.worker.get_stats()
+
+
+def publish_transitions(camera_name, zone_counts):
+    for e in alert_engine.update(camera_name, zone_counts, thresholds):
+        on = e["state"] == "on"
+        entry = add_alert(
+            f"Threshold exceeded in {e['zone']}" if on else f"{e['zone']} back under threshold",
+            camera=e["camera"], zone=e["zone"], count=e["count"],
+            threshold=e["threshold"], status="ALERT" if on else "CLEARED"
+        )
+        events.publish("alert", dict(e, message=entry.message, time=entry.time))
+
+
+def live_state():
+    return {
+        "counts": {name: feed.deltas.last for name, feed in feeds.items()},
+        "alerts": [f"{name}/{zone}" for name, feed in feeds.items() for zone in sorted(alert_engine.active(name))],
+    }
+
+# pushes count deltas and alert transitions to /events clients
+events = EventHub(snapshot=live_state)
+
+def start_feed(cam):
+    old = feeds.pop(cam.name, None)
+    if old is not None:
+        old.stop()
+    feeds[cam.name] = (ProcessCameraFeed if CAMERA_PROCESSES else CameraFeed)(cam).start()
+
+def get_feed(name=None):
+    if name:
+        return feeds.get(name)
+    if active_camera is not None:
+        return feeds.get(active_camera.name)
+    return None
+
+def generate_frames(feed, tier):
+    for frame in feed.broadcaster.subscribe(tier):
+        yield (b"--frame\r\n"
+               b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
 
+async def agenerate_frames(feed, tier):
+    async for frame in feed.broadcaster.asubscribe(tier):
         yield (b"--frame\r\n"
                b"Content-Type: image/jpeg\r\n\r\n" + frame + b"\r\n")
 
@@ -123,9 +300,61 @@ def generate_frames():
 def video_feed():
     if "admin" not in session:
         return redirect("/")
-    return Response(generate_frames(),
+    feed = get_feed(request.args.get("camera"))
+    if feed is None:
+        return "No active camera", 404
+    # ?size=full|half|thumb&quality=high|low
+    tier = parse_tier(request.args.get("size"), request.args.get("quality"))
+    if tier is None:
+        return "Unknown size or quality", 400
+    return Response(generate_frames(feed, tier),
         mimetype="multipart/x-mixed-replace; boundary=frame")
 
+@app.route("/pipeline_stats")
+def pipeline_stats():
+    if "admin" not in session:
+        return redirect("/")
+    stats = {
+        name: dict(feed.get_stats(), clients=feed.broadcaster.clients,
+                   tiers=["/".join(t) for t in feed.broadcaster.watched()])
+        for name, feed in feeds.items()
+    }
+    stats["batching"] = {backend: s.get_stats() for backend, s in schedulers.items()}
+    return jsonify(stats)
+
+@app.route("/events")
+def event_stream():
+    if "admin" not in session:
+        return redirect("/")
+    return Response(events.stream(request.headers.get("Last-Event-ID")),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+STORE_ITEMS.set_function(lambda: len(logs), store="logs")
+STORE_ITEMS.set_function(lambda: len(counts), store="counts")
+
+@app.route("/ready")
+def ready():
+    # 200 once every model is warm and every camera has analyzed a frame, 503 before
+    models = {pool.label: pool.get_stats() for pool in pools().values()}
+    for name, feed in feeds.items():
+        stats = feed.get_stats()
+        if "model" in stats: # analyzed in a worker process, which reports its own pool
+            models[f"camera:{name}"] = stats["model"] or {"ready": False}
+    state = {
+        "models": models,
+        "cameras": {name: feed.first_frame.is_set() for name, feed in feeds.items()},
+    }
+    if not feeds:
+        # nothing to analyze yet: not ready, rather than vacuously ready
+        return jsonify(dict(state, ready=False, reason="no cameras configured")), 503
+    ok = all(m["ready"] for m in models.values()) and all(state["cameras"].values())
+    return jsonify(dict(state, ready=ok)), 200 if ok else 503
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
 # ---------------- LOGIN ----------------
 @app.route("/", methods=["GET","POST"])
 def login():
@@ -154,25 +383,25 @@ def dashboard():
 # ---------------- CAMERA PAGE ----------------
 @app.route("/camera", methods=["GET","POST"])
 def camera_page():
-    global cameras, active_camera , cap
+    global cameras, active_camera
 
     if request.method == "POST":
         id= request.form.get("id")
         name = request.form.get("name")
         source = request.form.get("source")
+        backend = request.form.get("backend") or DEFAULT_BACKEND
         
 
+        if backend not in BACKENDS:
+            return f"unknown backend:{backend}",400
         if not os.path.exists(source):
             return f"video file not found:{source}",400
 
-        cam = Camera(name, source)
+        cam = Camera(name, source, backend)
         cameras.append(cam)
 
         active_camera=cam # 🔥 KEY LINE
-        if cap is not None:
-            cap.release()
-
-        cap=cv2.VideoCapture(cam.source)
+        start_feed(cam)
 
         return redirect(url_for("dashboard"))
 
@@ -204,6 +433,7 @@ def zone():
 
         zones.append(zone_data)
         save_zones(zones)
+        update_regions()
 
         return redirect("/zone")
 
@@ -218,13 +448,17 @@ def delete_zone(index):
     if 0 <= index < len(zones):
         zones.pop(index)
         save_zones(zones)
+        update_regions()
 
     return redirect("/zone")
 
+def current_thresholds():
+    return {t['zone']: t['value'] for t in thresholds}
+
 @app.route('/threshold')
 def threshold_page():
     if 'admin' not in session: return redirect('/')
-    return render_template('threshold.html', thresholds=thresholds_dict, alerts=logs)
+    return render_template('threshold.html', thresholds=current_thresholds(), alerts=list(reversed(logs)))
 
 @app.route('/threshold', methods=['GET', 'POST'])
 def threshold():
@@ -238,7 +472,8 @@ def threshold():
         if not zone_name or not value:
             return render_template(
                 'threshold.html',
-                thresholds=thresholds,
+                thresholds=current_thresholds(),
+                alerts=list(reversed(logs)),
                 zones=zones,
                 error="Zone and value required"
             )
@@ -250,7 +485,8 @@ def threshold():
 
     return render_template(
         'threshold.html',
-        thresholds=thresholds,
+        thresholds=current_thresholds(),
+        alerts=list(reversed(logs)),
         zones=zones
     )
 @app.route('/analytics')
@@ -259,8 +495,9 @@ def analytics():
         return redirect('/')
     
     # Safe default if zones or counts empty
-    zone_names = [z.get('name','Zone') for z in zones] if zones else ['Zone1']
-    zone_counts = [len(counts) for _ in zone_names] if counts else [0 for _ in zone_names]
+    zone_names = [zone_name(z, i) for i, z in enumerate(zones)] if zones else ['Zone1']
+    occupancy = counts.occupancy()
+    zone_counts = [occupancy.get(name, 0) for name in zone_names]
     
     return render_template('analytics.html',
                            zone_names=zone_names,
@@ -280,9 +517,11 @@ def export_daily():
     path = 'exports/daily.csv'
     with open(path,'w',newline='') as f:
         writer = csv.writer(f)
-        writer.writerow(['ID','Zone','Time'])
-        for c in counts:  # counts model से data
-            writer.writerow([c.id, c.zone, c.time])
+        writer.writerow(['Hour','Zone','Unique People','Peak','Average'])
+        today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0).timestamp()
+        for row in counts.hourly(today, today + 86400):  # counts model से data
+            writer.writerow([row['hour'].strftime('%Y-%m-%d %H:00'), row['zone'],
+                             row['unique'], row['peak'], row['average']])
     return send_file(path, as_attachment=True)
 
 @app.route('/export/threshold')
@@ -313,5 +552,30 @@ def logout():
     session.clear()
     return redirect("/")
 
+# ---------------- ASYNC SERVING ----------------
+# the same routes, with /video_feed and /events streamed from the event loop
+def video_feed_async():
+    if "admin" not in session:
+        return None
+    feed = get_feed(request.args.get("camera"))
+    tier = parse_tier(request.args.get("size"), request.args.get("quality"))
+    if feed is None or tier is None:
+        return None # the Flask route answers with the redirect / error
+    return "multipart/x-mixed-replace; boundary=frame", {}, agenerate_frames(feed, tier)
+
+def event_stream_async():
+    if "admin" not in session:
+        return None
+    return ("text/event-stream", {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            events.astream(request.headers.get("Last-Event-ID")))
+
+def asgi():
+    from vision.asgi import AsyncServer
+    return AsyncServer(app, {"/video_feed": video_feed_async, "/events": event_stream_async})
+
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    if "--asgi" in sys.argv:
+        from vision.asgi import serve
+        serve(asgi())
+    else:
+        app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,80 @@
+# asgi.py
+# Async serving mode: long-lived streams (MJPEG, SSE) are served from one
+# event loop, every other route goes through the Flask app unchanged (run in
+# a worker thread by asgiref's WSGI adapter). The analysis work stays in its
+# own threads; a stream client costs one coroutine instead of one thread.
+#
+#   python app.py --asgi      or      uvicorn --factory app:asgi
+import asyncio
+
+
+class AsyncServer:
+    def __init__(self, flask_app, streams):
+        """
+        flask_app: the Flask app that serves every route
+        streams: {path: fn() -> (mimetype, headers, async iterator of bytes) or None};
+                 fn runs inside a Flask request context (request, session work as
+                 usual) and returns None to let the Flask route answer instead
+                 (redirects, 404s, bad parameters)
+        """
+        from asgiref.wsgi import WsgiToAsgi
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.streams = streams
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            return await self._lifespan(receive, send)
+        handler = self.streams.get(scope["path"]) if scope["type"] == "http" else None
+        if handler is not None:
+            result = self._open(scope, handler)
+            if result is not None:
+                return await self._stream(result, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _open(self, scope, handler):
+        headers = [(k.decode("latin-1"), v.decode("latin-1")) for k, v in scope["headers"]]
+        with self.flask_app.test_request_context(
+                scope["path"], query_string=scope["query_string"].decode("latin-1"), headers=headers):
+            return handler()
+
+    async def _stream(self, result, receive, send):
+        mimetype, headers, body = result
+        raw_headers = [(b"content-type", mimetype.encode())]
+        raw_headers += [(k.lower().encode(), v.encode()) for k, v in headers.items()]
+        await send({"type": "http.response.start", "status": 200, "headers": raw_headers})
+
+        disconnected = asyncio.Event()
+
+        async def watch():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+
+        watcher = asyncio.ensure_future(watch())
+        try:
+            async for chunk in body:
+                if disconnected.is_set():
+                    break
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError:
+            pass # client went away mid-send
+        finally:
+            watcher.cancel()
+            await body.aclose()
+
+
+def serve(asgi_app, host="127.0.0.1", port=5000):
+    import uvicorn
+    uvicorn.run(asgi_app, host=host, port=port, log_level="warning")
@@ -0,0 +1,204 @@
+# backends.py
+# CPU inference backends for the YOLO detectors. Every backend returns, per
+# frame, an (N, 6) float array of [x1, y1, x2, y2, score, class_id].
+#   torch       ultralytics.YOLO (PyTorch), the original path
+#   onnx        ONNX Runtime on a local export of the .pt weights
+#   onnx-int8   ONNX Runtime on a statically quantized INT8 model
+#   openvino    OpenVINO runtime on the same ONNX export
+import os
+
+import cv2
+import numpy as np
+
+BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+
+
+def letterbox(frame, imgsz):
+    """Resizes keeping aspect ratio and pads to imgsz x imgsz; returns (img, scale, pad_x, pad_y)."""
+    h, w = frame.shape[:2]
+    scale = min(imgsz / h, imgsz / w)
+    nh, nw = int(round(h * scale)), int(round(w * scale))
+    pad_x, pad_y = (imgsz - nw) // 2, (imgsz - nh) // 2
+    img = np.full((imgsz, imgsz, 3), 114, dtype=np.uint8)
+    img[pad_y:pad_y + nh, pad_x:pad_x + nw] = cv2.resize(frame, (nw, nh), interpolation=cv2.INTER_LINEAR)
+    return img, scale, pad_x, pad_y
+
+
+def to_blob(frames, imgsz):
+    """BGR uint8 frames -> (B, 3, imgsz, imgsz) float32 RGB blob plus letterbox params."""
+    imgs, params = [], []
+    for f in frames:
+        img, scale, px, py = letterbox(f, imgsz)
+        imgs.append(img)
+        params.append((scale, px, py))
+    blob = np.stack(imgs)[..., ::-1].transpose(0, 3, 1, 2)
+    return np.ascontiguousarray(blob, dtype=np.float32) / 255.0, params
+
+
+def postprocess(output, params, shapes, conf=0.25, classes=None, iou=0.45):
+    """Raw YOLOv8 head output (B, 4 + num_classes, anchors) -> list of (N, 6) arrays."""
+    results = []
+    for pred, (scale, px, py), shape in zip(output, params, shapes):
+        pred = pred.T # (anchors, 4 + nc)
+        cls_scores = pred[:, 4:]
+        class_id = cls_scores.argmax(axis=1)
+        score = cls_scores[np.arange(len(pred)), class_id]
+        keep = score >= conf
+        if classes is not None:
+            keep &= np.isin(class_id, classes)
+        pred, score, class_id = pred[keep], score[keep], class_id[keep]
+        if len(pred) == 0:
+            results.append(np.zeros((0, 6), dtype=np.float32))
+            continue
+
+        cx, cy, w, h = pred[:, 0], pred[:, 1], pred[:, 2], pred[:, 3]
+        boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+        boxes[:, [0, 2]] = (boxes[:, [0, 2]] - px) / scale
+        boxes[:, [1, 3]] = (boxes[:, [1, 3]] - py) / scale
+        boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, shape[1])
+        boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, shape[0])
+
+        # class-aware NMS: offset boxes per class so different classes never suppress each other
+        offset = class_id[:, None].astype(np.float32) * 4096
+        xywh = np.concatenate([boxes[:, :2] + offset, boxes[:, 2:] - boxes[:, :2]], axis=1)
+        idx = cv2.dnn.NMSBoxes(xywh.tolist(), score.tolist(), conf, iou)
+        idx = np.asarray(idx, dtype=np.int64).reshape(-1)
+        results.append(np.concatenate(
+            [boxes[idx], score[idx, None], class_id[idx, None].astype(np.float32)], axis=1
+        ).astype(np.float32))
+    return results
+
+
+# ---------------- BACKENDS ----------------
+class TorchBackend:
+    name = "torch"
+
+    def __init__(self, weights="yolov8n.pt", device="cpu"):
+        from ultralytics import YOLO
+        self.model = YOLO(weights)
+        self.model.fuse() # optional speedup
+        self.device = device
+
+    def predict(self, frames, imgsz=640, conf=0.25, classes=None):
+        results = self.model(list(frames), imgsz=imgsz, conf=conf, classes=classes,
+                             device=self.device, verbose=False)
+        out = []
+        for r in results:
+            if r.boxes is None:
+                out.append(np.zeros((0, 6), dtype=np.float32))
+                continue
+            out.append(r.boxes.data.cpu().numpy()[:, :6].astype(np.float32))
+        return out
+
+
+class OnnxBackend:
+    name = "onnx"
+
+    def __init__(self, model_path, threads=None):
+        import onnxruntime as ort
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict(self, frames, imgsz=640, conf=0.25, classes=None):
+        blob, params = to_blob(frames, imgsz)
+        output = self.session.run(None, {self.input_name: blob})[0]
+        return postprocess(output, params, [f.shape for f in frames], conf, classes)
+
+
+class OpenVINOBackend:
+    name = "openvino"
+
+    def __init__(self, model_path, threads=None):
+        import openvino as ov
+        core = ov.Core()
+        config = {"INFERENCE_NUM_THREADS": threads} if threads else {}
+        self.model = core.compile_model(core.read_model(model_path), "CPU", config)
+
+    def predict(self, frames, imgsz=640, conf=0.25, classes=None):
+        blob, params = to_blob(frames, imgsz)
+        output = self.model(blob)[0]
+        return postprocess(np.asarray(output), params, [f.shape for f in frames], conf, classes)
+
+
+# ---------------- EXPORT / QUANTIZATION ----------------
+def export_onnx(weights="yolov8n.pt", imgsz=640):
+    """Exports the .pt weights next to themselves as .onnx (dynamic batch); returns the path."""
+    path = os.path.splitext(weights)[0] + ".onnx"
+    if not os.path.exists(path):
+        from ultralytics import YOLO
+        path = YOLO(weights).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+    return path
+
+
+def calibration_frames(sources, count=200, imgsz=640):
+    """Evenly sampled frames from our own videos, as single-image blobs for INT8 calibration."""
+    if isinstance(sources, str):
+        sources = [sources]
+    per_source = max(1, count // len(sources))
+    for src in sources:
+        cap = cv2.VideoCapture(src)
+        total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or per_source
+        step = max(1, total // per_source)
+        for i in range(0, total, step):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, i)
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield to_blob([frame], imgsz)[0]
+        cap.release()
+
+
+def quantize_int8(onnx_path, calib_sources, out_path=None, count=200, imgsz=640):
+    """Static INT8 quantization of an ONNX export, calibrated on frames from calib_sources."""
+    from onnxruntime.quantization import (CalibrationDataReader, QuantFormat, QuantType,
+                                          quantize_static)
+
+    out_path = out_path or os.path.splitext(onnx_path)[0] + "-int8.onnx"
+
+    class _Reader(CalibrationDataReader):
+        def __init__(self):
+            import onnxruntime as ort
+            name = ort.InferenceSession(onnx_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+            self.batches = ({name: blob} for blob in calibration_frames(calib_sources, count, imgsz))
+
+        def get_next(self):
+            return next(self.batches, None)
+
+    quantize_static(onnx_path, out_path, _Reader(),
+                    quant_format=QuantFormat.QDQ,
+                    activation_type=QuantType.QUInt8,
+                    weight_type=QuantType.QInt8,
+                    per_channel=True)
+    return out_path
+
+
+def make_backend(name="torch", weights="yolov8n.pt", calib_sources=None, threads=None):
+    """
+    Builds a backend by name. ONNX/OpenVINO models are exported from the .pt
+    weights on first use; onnx-int8 needs calib_sources (video paths) the first
+    time it is quantized.
+    """
+    if name == "torch":
+        return TorchBackend(weights)
+    if weights.endswith(".pt"):
+        onnx_path = export_onnx(weights)
+    else:
+        onnx_path = weights
+    if name == "onnx":
+        return OnnxBackend(onnx_path, threads)
+    if name == "onnx-int8":
+        int8_path = os.path.splitext(onnx_path)[0] + "-int8.onnx"
+        if not os.path.exists(int8_path):
+            if not calib_sources:
+                raise ValueError("onnx-int8 needs calib_sources to quantize the model the first time")
+            quantize_int8(onnx_path, calib_sources, int8_path)
+        backend = OnnxBackend(int8_path, threads)
+        backend.name = "onnx-int8"
+        return backend
+    if name == "openvino":
+        return OpenVINOBackend(onnx_path, threads)
+    raise ValueError(f"Unknown backend {name!r}, expected one of {BACKENDS}")
@@ -0,0 +1,465 @@
+# batch_process.py
+# Headless reprocessing of recorded footage: every video in a directory is
+# analyzed in a pool of worker processes (one detector per worker, torch
+# threads pinned so workers don't oversubscribe the cores), e.g.:
+#   python batch_process.py videos/ --out results/ --workers 4 --format parquet
+# Per video it writes <name>.frames.<fmt> (per-frame total and "zone:<name>"
+# counts) and <name>.alerts.<fmt> (alert transitions); summary.<fmt> has one
+# row per video. <name> is the video's path below the folder all inputs share
+# (a/cam1.mp4 -> a__cam1), so same-named videos in different folders don't
+# overwrite each other. Workers stream per-frame rows to part files as they
+# go; the parent only joins them, so no video's rows are ever held in memory.
+# A long recording can also be split into frame-range segments processed in
+# parallel (--segments); track IDs are stitched across segment boundaries by
+# matching tracks in a short warmup overlap.
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+TRACK_COLUMNS = ["frame", "id", "cx", "cy"]
+
+# per-process state, set up once by init_worker
+_detector = None
+
+
+def init_worker(backend, weights, threads):
+    global _detector
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(1)
+    if backend == "torch":
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+    from vision.detector import PersonDetector
+    from vision.model_pool import configure
+    configure(workers=1, threads=threads) # the process pool already spreads work over the cores
+    _detector = PersonDetector(backend=backend, weights=weights, threads=threads)
+
+
+def load_zone_file(path):
+    """zones.json as written by main.py ({name: box}) or app.py ([zone, ...]) -> (zones, names)."""
+    from vision.zone_raster import zone_name
+    with open(path) as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        return list(data.values()), list(data.keys())
+    return data, [zone_name(z, i) for i, z in enumerate(data)]
+
+
+def zone_column(name):
+    # prefixed, so a zone called "frame", "time", "total" or "alert" can't clobber those columns
+    return f"zone:{name}"
+
+
+def frame_columns(names):
+    return ["frame", "time", "total", *map(zone_column, names), "alert"]
+
+
+class RowWriter:
+    """Streams dict rows to a CSV file, or to a Parquet file one row group per `chunk` rows."""
+
+    def __init__(self, path, fmt, columns, chunk=10_000):
+        self.path = path
+        self.fmt = fmt
+        self.columns = list(columns)
+        self.chunk = chunk
+        self.rows = []
+        self.writer = None
+        if fmt == "csv":
+            self.file = open(path, "w", newline="")
+            self.writer = csv.DictWriter(self.file, fieldnames=self.columns)
+            if self.columns:
+                self.writer.writeheader()
+
+    def write(self, row):
+        if self.fmt == "csv":
+            self.writer.writerow(row)
+            return
+        self.rows.append(row)
+        if len(self.rows) >= self.chunk:
+            self._flush()
+
+    def _flush(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            # the first row group fixes the schema for the rest of the file
+            table = (pa.Table.from_pylist(self.rows) if self.rows
+                     else pa.table({c: pa.array([]) for c in self.columns}))
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            table = pa.Table.from_pylist(self.rows, schema=self.writer.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        if self.fmt == "csv":
+            self.file.close()
+            return
+        if self.rows or self.writer is None:
+            self._flush()
+        self.writer.close()
+
+
+def read_rows(path, fmt):
+    """Yields the rows of a file written by RowWriter as dicts (CSV values as strings)."""
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+        return
+    with open(path, newline="") as f:
+        yield from csv.DictReader(f)
+
+
+def find_videos(paths):
+    videos = []
+    for p in paths:
+        if os.path.isdir(p):
+            for name in sorted(os.listdir(p)):
+                if name.lower().endswith(VIDEO_EXTENSIONS):
+                    videos.append(os.path.join(p, name))
+        else:
+            videos.append(p)
+    return videos
+
+
+def video_names(videos):
+    """Each video's path relative to the folder all inputs share, so equal basenames stay apart."""
+    base = os.path.commonpath([os.path.dirname(os.path.abspath(v)) for v in videos])
+    return {v: os.path.relpath(os.path.abspath(v), base) for v in videos}
+
+
+def output_stem(name):
+    # videos/a/cam1.mp4 and videos/b/cam1.mp4 -> a__cam1, b__cam1
+    return os.path.splitext(name)[0].replace(os.sep, "__")
+
+
+def process_video(path, zones, names, threshold, size, detect_every,
+                  start=0, end=None, warmup=0, keep_tracks=False, out_dir=".", fmt="csv", name=None):
+    """
+    Runs detection, tracking, zone counting and alerting over frames
+    [start, end) of one file (end=None: to the end). The `warmup` frames before
+    start are processed too, to settle the tracker and alert state, but only
+    reported as the segment's "head" tracks; its last `warmup` frames are
+    reported as "tail" tracks, so neighbouring segments can be stitched.
+    Per-frame rows go to part files in out_dir (see write_video); only the
+    alerts and per-zone aggregates are returned. name: the video's name in
+    the outputs (see video_names), its basename by default.
+    """
+    from vision.alerts import AlertEngine
+    from vision.motion import MotionPredictor
+    from vision.tracker import SimpleTracker
+    from vision.zone_raster import ZoneRaster
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Cannot open {path}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    first = max(0, start - warmup)
+    if first:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+        # some codecs land on the nearest keyframe; trust the reported position
+        first = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+
+    tracker = SimpleTracker()
+    motion = MotionPredictor()
+    raster = None
+    # alerts are debounced in video time, not wall time
+    alert_engine = AlertEngine(hysteresis=1, min_duration=2.0)
+    limits = [{"zone": z, "value": threshold + 1} for z in names]
+
+    stem = os.path.join(out_dir, f"{output_stem(name or os.path.basename(path))}.{start}")
+    frames_path = f"{stem}.frames.part.{fmt}"
+    tracks_path = f"{stem}.tracks.part.{fmt}" if keep_tracks else None
+    frames_out = RowWriter(frames_path, fmt, frame_columns(names))
+    tracks_out = RowWriter(tracks_path, fmt, TRACK_COLUMNS) if keep_tracks else None
+
+    alerts = []
+    frames = peak_total = 0
+    # keyed by name: zones the raster skips (invalid shapes) just stay at 0
+    zone_sum, zone_peak = dict.fromkeys(names, 0), dict.fromkeys(names, 0)
+    head, tail = {}, {} # frame -> {track id: (cx, cy)}
+    ids = set()
+    started = time.perf_counter()
+    idx = first
+    finished = False
+    try:
+        while end is None or idx < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if size:
+                frame = cv2.resize(frame, size)
+            if raster is None:
+                raster = ZoneRaster(frame.shape)
+                raster.compile(zones, names=names)
+            t = idx / fps
+
+            if idx % detect_every == 0:
+                objects = tracker.update(_detector.detect(frame))
+                motion.observe(tracker.boxes)
+            else:
+                objects = {i: ((x1+x2)//2, (y1+y2)//2) for i, (x1, y1, x2, y2) in motion.predict().items()}
+
+            zone_counts = dict.fromkeys(names, 0)
+            zone_counts.update(zip(raster.names, raster.counts(list(objects.values())).tolist()))
+            transitions = alert_engine.update("batch", zone_counts, limits, now=t)
+            if idx < start:
+                head[idx] = dict(objects)
+                idx += 1
+                continue
+
+            for e in transitions:
+                alerts.append({"frame": idx, "time": round(t, 3), "zone": e["zone"], "count": e["count"],
+                               "threshold": threshold, "state": e["state"]})
+            row = {"frame": idx, "time": round(t, 3), "total": len(objects)}
+            row.update((zone_column(z), n) for z, n in zone_counts.items())
+            row["alert"] = "|".join(sorted(alert_engine.active("batch")))
+            frames_out.write(row)
+            frames += 1
+            peak_total = max(peak_total, len(objects))
+            for z, n in zone_counts.items():
+                zone_sum[z] += n
+                zone_peak[z] = max(zone_peak[z], n)
+            ids.update(objects)
+            if keep_tracks:
+                for i, (cx, cy) in objects.items():
+                    tracks_out.write({"frame": idx, "id": i, "cx": cx, "cy": cy})
+            tail[idx] = dict(objects)
+            if len(tail) > warmup:
+                del tail[min(tail)]
+            idx += 1
+        finished = True
+    finally:
+        cap.release()
+        frames_out.close()
+        if tracks_out is not None:
+            tracks_out.close()
+        if not finished:
+            discard_parts({"frames_path": frames_path, "tracks_path": tracks_path})
+
+    return {
+        "start": start,
+        "fps": fps,
+        "frames": frames,
+        "frames_path": frames_path,
+        "tracks_path": tracks_path,
+        "alerts": alerts,
+        "peak_total": peak_total,
+        "zones": {z: (zone_sum[z], zone_peak[z]) for z in names},
+        "ids": ids,
+        "head": head,
+        "tail": tail,
+        "elapsed": time.perf_counter() - started,
+    }
+
+
+def match_tracks(prev_tail, head, max_distance=50, min_votes=3):
+    """
+    Maps this segment's track ids to the previous segment's, by how many
+    overlap frames each pair of tracks sat within max_distance of each other
+    (nearest neighbour per frame, then one-to-one by most votes).
+    """
+    votes = {}
+    for f, objects in head.items():
+        prev = prev_tail.get(f)
+        if not prev:
+            continue
+        for tid, (x, y) in objects.items():
+            pid, (px, py) = min(prev.items(), key=lambda kv: (kv[1][0] - x) ** 2 + (kv[1][1] - y) ** 2)
+            if (px - x) ** 2 + (py - y) ** 2 <= max_distance ** 2:
+                votes[(tid, pid)] = votes.get((tid, pid), 0) + 1
+
+    mapping, used = {}, set()
+    for (tid, pid), n in sorted(votes.items(), key=lambda kv: -kv[1]):
+        if n < min_votes or tid in mapping or pid in used:
+            continue
+        mapping[tid] = pid
+        used.add(pid)
+    return mapping
+
+
+def merge_segments(segments):
+    """
+    Orders a video's segments and renumbers their track ids to be global:
+    (segments, one {segment id: global id} mapping per segment, alerts, unique people).
+    """
+    segments = sorted(segments, key=lambda s: s["start"])
+    mappings, alerts = [], []
+    unique = set()
+    next_id = 1
+    prev_tail = {}
+    for seg in segments:
+        mapping = match_tracks(prev_tail, seg["head"])
+        for tid in sorted(seg["ids"]):
+            if tid not in mapping:
+                mapping[tid] = next_id
+                next_id += 1
+        unique.update(mapping[t] for t in seg["ids"])
+        mappings.append(mapping)
+        alerts.extend(seg["alerts"])
+        prev_tail = {f: {mapping[t]: p for t, p in objs.items()} for f, objs in seg["tail"].items()}
+    return segments, mappings, alerts, len(unique)
+
+
+def summarize(video, segments, alerts, names, unique):
+    fps = segments[0]["fps"]
+    elapsed = sum(s["elapsed"] for s in segments)
+    frames = sum(s["frames"] for s in segments)
+    summary = {
+        "video": video,
+        "frames": frames,
+        "duration_s": round(frames / fps, 1),
+        "segments": len(segments),
+        "processing_s": round(elapsed, 1),
+        "processing_fps": round(frames / elapsed, 1) if elapsed > 0 else None,
+        "unique_people": unique,
+        "peak_total": max(s["peak_total"] for s in segments),
+        "alerts": sum(1 for a in alerts if a["state"] == "on"),
+    }
+    for z in names:
+        summary[f"{z}_peak"] = max(s["zones"][z][1] for s in segments)
+        summary[f"{z}_mean"] = round(sum(s["zones"][z][0] for s in segments) / frames, 2) if frames else 0
+    return summary
+
+
+def write_rows(path, rows, fmt):
+    out = RowWriter(path, fmt, rows[0].keys() if rows else [])
+    for row in rows:
+        out.write(row)
+    out.close()
+
+
+def join_parts(path, fmt, columns, parts, mappings=None):
+    """Concatenates segment part files in order (renumbering track ids by mappings) and removes them."""
+    out = RowWriter(path, fmt, columns)
+    try:
+        for part, mapping in zip(parts, mappings or [None] * len(parts)):
+            for row in read_rows(part, fmt):
+                if mapping is not None:
+                    row["id"] = mapping[int(row["id"])]
+                out.write(row)
+            os.remove(part)
+    finally:
+        out.close()
+
+
+def discard_parts(segment):
+    for part in (segment["frames_path"], segment["tracks_path"]):
+        if part and os.path.exists(part):
+            os.remove(part)
+
+
+def write_video(path, segments, out_dir, fmt, names, keep_tracks, name=None):
+    """Joins a video's segment part files into its output files and returns the summary row."""
+    segments, mappings, alerts, unique = merge_segments(segments)
+    name = name or os.path.basename(path)
+    stem = output_stem(name)
+    join_parts(os.path.join(out_dir, f"{stem}.frames.{fmt}"), fmt, frame_columns(names),
+               [s["frames_path"] for s in segments])
+    write_rows(os.path.join(out_dir, f"{stem}.alerts.{fmt}"), alerts, fmt)
+    if keep_tracks:
+        join_parts(os.path.join(out_dir, f"{stem}.tracks.{fmt}"), fmt, TRACK_COLUMNS,
+                   [s["tracks_path"] for s in segments], mappings)
+    return summarize(name, segments, alerts, names, unique)
+
+
+def split_video(path, segments, min_frames=2000):
+    """[(start, end), ...] frame ranges; the last one runs to the end of the file."""
+    cap = cv2.VideoCapture(path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    n = max(1, min(segments, total // min_frames)) if total > 0 else 1
+    bounds = [total * i // n for i in range(n)]
+    return [(b, bounds[i + 1] if i + 1 < n else None) for i, b in enumerate(bounds)]
+
+
+def parse_size(text):
+    if not text or text == "native":
+        return None
+    w, h = text.lower().split("x")
+    return int(w), int(h)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless batch processing of recorded videos")
+    parser.add_argument("inputs", nargs="+", help="video files or directories of videos")
+    parser.add_argument("--out", default="results")
+    parser.add_argument("--format", choices=("csv", "parquet"), default="csv")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--threads", type=int, default=1, help="inference threads per worker")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--zones", default="zones.json")
+    parser.add_argument("--threshold", type=int, default=4, help="alert when a zone holds more people")
+    parser.add_argument("--size", default="640x480", help="WxH the zones were drawn at, or 'native'")
+    parser.add_argument("--detect-every", type=int, default=1, help="run the detector on every k-th frame")
+    parser.add_argument("--segments", type=int, default=1,
+                        help="split each video into up to N frame ranges processed in parallel")
+    parser.add_argument("--warmup", type=int, default=75,
+                        help="overlap frames processed before each segment to stitch track ids")
+    parser.add_argument("--tracks", action="store_true", help="also write per-frame track positions")
+    args = parser.parse_args()
+
+    videos = find_videos(args.inputs)
+    if not videos:
+        raise SystemExit("No videos found")
+    zones, names = load_zone_file(args.zones) if os.path.exists(args.zones) else ([], [])
+    os.makedirs(args.out, exist_ok=True)
+    size = parse_size(args.size)
+
+    started = time.perf_counter()
+    summaries, failed = [], []
+    labels = video_names(videos)
+    ranges = {v: split_video(v, args.segments) if args.segments > 1 else [(0, None)] for v in videos}
+    done = {v: [] for v in videos}
+    workers = max(1, min(args.workers, sum(len(r) for r in ranges.values())))
+    with ProcessPoolExecutor(workers, initializer=init_worker,
+                             initargs=(args.backend, args.weights, args.threads)) as pool:
+        jobs = {}
+        for v, parts in ranges.items():
+            for start, end in parts:
+                job = pool.submit(process_video, v, zones, names, args.threshold, size, args.detect_every,
+                                  start, end, args.warmup, args.tracks, args.out, args.format, labels[v])
+                jobs[job] = v
+        for job in as_completed(jobs):
+            video = jobs[job]
+            if video in failed:
+                if job.exception() is None:
+                    discard_parts(job.result())
+                continue
+            try:
+                done[video].append(job.result())
+            except Exception as e:
+                failed.append(video)
+                print(f"  FAILED {video}: {e}", file=sys.stderr)
+                for seg in done.pop(video):
+                    discard_parts(seg)
+                continue
+            if len(done[video]) < len(ranges[video]):
+                continue
+            s = write_video(video, done.pop(video), args.out, args.format, names, args.tracks, labels[video])
+            summaries.append(s)
+            print(f"  {s['video']}: {s['frames']} frames at {s['processing_fps']} fps, "
+                  f"peak {s['peak_total']} people, {s['alerts']} alerts")
+
+    summaries.sort(key=lambda s: s["video"])
+    write_rows(os.path.join(args.out, f"summary.{args.format}"), summaries, args.format)
+    elapsed = time.perf_counter() - started
+    total = sum(s["frames"] for s in summaries)
+    print(f"{len(summaries)} videos, {total} frames in {elapsed:.1f}s "
+          f"({total / elapsed:.1f} fps across {workers} workers)")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
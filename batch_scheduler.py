@@ -0,0 +1,122 @@
+# batch_scheduler.py
+# Collects the latest frame from every active camera and runs them through
+# one batched detector call
+import threading
+import time
+
+
+class _Slot:
+    def __init__(self, frame):
+        self.frame = frame
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class BatchScheduler:
+    def __init__(self, detect_batch, max_batch=16, max_wait=0.01):
+        """
+        detect_batch: fn(list of frames) -> list of per-frame detections
+        max_batch: most frames sent in one forward pass
+        max_wait: how long (sec) to wait for the other cameras once one frame is in
+        """
+        self.detect_batch = detect_batch
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.cond = threading.Condition()
+        self.active = set()
+        self.pending = {} # camera key -> _Slot (latest frame only)
+        self.batches = 0
+        self.frames = 0
+        self.superseded = 0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def register(self, key):
+        with self.cond:
+            self.active.add(key)
+
+    def unregister(self, key):
+        with self.cond:
+            self.active.discard(key)
+            slot = self.pending.pop(key, None)
+            self.cond.notify_all()
+        if slot is not None:
+            slot.done.set()
+
+    def detect(self, key, frame, timeout=None):
+        """
+        Called from a camera's detect stage. Blocks until the batch containing
+        this frame has run and returns its detections, or None if a newer
+        frame from the same camera replaced it first.
+        """
+        slot = _Slot(frame)
+        with self.cond:
+            old = self.pending.get(key)
+            self.pending[key] = slot
+            self.cond.notify_all()
+        if old is not None:
+            self.superseded += 1
+            old.done.set()
+
+        slot.done.wait(timeout)
+        if slot.error is not None:
+            raise slot.error
+        return slot.result
+
+    def _ready(self):
+        return len(self.pending) >= max(1, min(len(self.active), self.max_batch))
+
+    def _take_batch(self):
+        with self.cond:
+            while not self.pending:
+                if self.stop_event.is_set():
+                    return {}
+                self.cond.wait(0.1)
+            # give the other cameras a moment to hand in their frame
+            deadline = time.monotonic() + self.max_wait
+            while not self._ready() and not self.stop_event.is_set():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self.cond.wait(remaining)
+
+            keys = list(self.pending)[:self.max_batch]
+            return {k: self.pending.pop(k) for k in keys}
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            batch = self._take_batch()
+            if not batch:
+                continue
+            slots = list(batch.values())
+            try:
+                results = self.detect_batch([s.frame for s in slots])
+                for slot, res in zip(slots, results):
+                    slot.result = res
+            except Exception as e:
+                for slot in slots:
+                    slot.error = e
+            self.batches += 1
+            self.frames += len(slots)
+            for slot in slots:
+                slot.done.set()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        with self.cond:
+            self.cond.notify_all()
+
+    def get_stats(self):
+        return {
+            "cameras": len(self.active),
+            "batches": self.batches,
+            "frames": self.frames,
+            "avg_batch": round(self.frames / self.batches, 2) if self.batches else 0.0,
+            "superseded": self.superseded,
+        }
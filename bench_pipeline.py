@@ -0,0 +1,205 @@
+# bench_pipeline.py
+# Offline, headless per-stage benchmark of the real pipeline pieces, e.g.:
+#   python bench_pipeline.py --video "videos/Entrance area.mp4" --frames 300 --out bench.json
+#   python bench_pipeline.py --synthetic --frames 300 --compare bench.json
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from vision.batch_process import load_zone_file
+from vision.detector import PersonDetector
+from vision.heatmap import HeatMap
+from vision.tracker import SimpleTracker
+from vision.zone_raster import ZoneRaster
+
+SYNTHETIC_FILE = "bench_synthetic.avi"
+
+
+def make_synthetic_video(path, frames=300, size=(640, 480), people=40, fps=25):
+    """Writes a clip of moving person-sized blobs; returns their boxes per frame."""
+    w, h = size
+    rng = np.random.default_rng(0)
+    pos = rng.uniform([0, 0], [w, h], size=(people, 2))
+    vel = rng.uniform(-3, 3, size=(people, 2))
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    truth = []
+    for _ in range(frames):
+        frame = np.full((h, w, 3), 90, dtype=np.uint8)
+        pos = (pos + vel) % [w, h]
+        boxes = []
+        for x, y in pos.astype(int):
+            box = (x - 12, y - 30, x + 12, y + 30)
+            cv2.rectangle(frame, box[:2], box[2:], (40, 40, 160), -1)
+            cv2.circle(frame, (x, y - 36), 9, (150, 180, 220), -1)
+            boxes.append(box)
+        writer.write(frame)
+        truth.append(boxes)
+    writer.release()
+    return truth
+
+
+def peak_rss_mb():
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def summarize(samples):
+    ms = np.array(samples) * 1000
+    if len(ms) == 0:
+        return {"n": 0}
+    return {
+        "n": int(len(ms)),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "fps": round(1000.0 / float(ms.mean()), 1) if ms.mean() > 0 else None,
+    }
+
+
+def bench(args):
+    truth = None
+    source = args.video
+    if args.synthetic or not source:
+        source = SYNTHETIC_FILE
+        truth = make_synthetic_video(source, args.frames)
+
+    cap = cv2.VideoCapture(source)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open {source}")
+
+    detector = None if args.no_detect else PersonDetector(backend=args.backend)
+    tracker = SimpleTracker()
+    deepsort = None
+    if args.deepsort:
+        from vision.tracker_deepsort import DeepSortTracker
+        deepsort = DeepSortTracker()
+    # same zone files as production: main.py's {name: box} or app.py's [zone, ...]
+    zones, names = [], []
+    if args.zones and os.path.exists(args.zones):
+        try:
+            zones, names = load_zone_file(args.zones)
+        except ValueError:
+            zones, names = [], []
+    raster = heatmap = None
+
+    timings = {k: [] for k in ("decode", "detect", "track", "deepsort", "zones",
+                               "heatmap_update", "heatmap_draw", "encode", "total")}
+    t = time.perf_counter
+    n = 0
+    while n < args.frames:
+        start = t()
+        ret, frame = cap.read()
+        timings["decode"].append(t() - start)
+        if not ret:
+            break
+        if raster is None:
+            raster = ZoneRaster(frame.shape)
+            raster.compile(zones, names=names)
+            heatmap = HeatMap(frame.shape)
+
+        s = t()
+        if detector is not None:
+            boxes = detector.detect(frame)
+            timings["detect"].append(t() - s)
+        else:
+            boxes = truth[n] if truth else []
+
+        s = t()
+        objects = tracker.update(boxes)
+        timings["track"].append(t() - s)
+
+        if deepsort is not None:
+            dets = [[*b, 1.0, 0] for b in boxes]
+            s = t()
+            deepsort.update(dets, frame)
+            timings["deepsort"].append(t() - s)
+
+        s = t()
+        raster.counts(list(objects.values()))
+        timings["zones"].append(t() - s)
+
+        s = t()
+        heatmap.update(objects)
+        timings["heatmap_update"].append(t() - s)
+        s = t()
+        frame = heatmap.draw(frame)
+        timings["heatmap_draw"].append(t() - s)
+
+        s = t()
+        cv2.imencode(".jpg", frame)
+        timings["encode"].append(t() - s)
+        timings["total"].append(t() - start)
+        n += 1
+    cap.release()
+
+    return {
+        "source": source,
+        "frames": n,
+        "backend": None if args.no_detect else args.backend,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "peak_rss_mb": peak_rss_mb(),
+        "stages": {k: summarize(v) for k, v in timings.items() if v},
+    }
+
+
+def compare(result, baseline, tolerance):
+    """Prints stages whose p95 got slower than the baseline by more than tolerance; returns them."""
+    regressions = []
+    for stage, cur in result["stages"].items():
+        old = baseline.get("stages", {}).get(stage)
+        if not old or not old.get("p95_ms") or "p95_ms" not in cur:
+            continue
+        change = cur["p95_ms"] / old["p95_ms"] - 1
+        flag = "REGRESSION" if change > tolerance else ""
+        print(f"  {stage:15s} p95 {old['p95_ms']:9.3f} -> {cur['p95_ms']:9.3f} ms ({change:+.1%}) {flag}")
+        if flag:
+            regressions.append(stage)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage pipeline benchmark")
+    parser.add_argument("--video", help="recorded video to run on")
+    parser.add_argument("--synthetic", action="store_true", help="generate a synthetic crowd clip instead")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--no-detect", action="store_true",
+                        help="skip the detector (synthetic clip: use its ground-truth boxes)")
+    parser.add_argument("--deepsort", action="store_true", help="also time DeepSortTracker.update")
+    parser.add_argument("--zones", default="zones.json")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="allowed p95 slowdown (0.15 = 15%%)")
+    args = parser.parse_args()
+
+    result = bench(args)
+    print(f"{result['frames']} frames from {result['source']}, peak RSS {result['peak_rss_mb']} MB")
+    print(f"  {'stage':15s} {'p50':>9s} {'p95':>9s} {'p99':>9s} {'fps':>8s}")
+    for stage, s in result["stages"].items():
+        print(f"  {stage:15s} {s['p50_ms']:9.3f} {s['p95_ms']:9.3f} {s['p99_ms']:9.3f} {s['fps'] or 0:8.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.compare}:")
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
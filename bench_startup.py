@@ -0,0 +1,84 @@
+# bench_startup.py
+# Cold-start benchmark: each measurement runs in a fresh interpreter, e.g.:
+#   python bench_startup.py --runs 5 --out startup.json
+#   python bench_startup.py --runs 5 --compare startup.json
+#   import_main   import main.py (web + video loop module)
+#   import_app    import app.py (admin UI)
+#   model_ready   load and warm the shared model pool
+#   first_frame   imports + model + decode + detect of the first video frame
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from vision.bench_pipeline import compare, summarize
+
+MARK = "STARTUP_SECONDS "
+
+SNIPPETS = {
+    "import_main": "import main",
+    "import_app": "import app",
+    "model_ready": ("from vision.model_pool import get_pool\n"
+                    "get_pool({weights!r}, {backend!r}).ready.wait()"),
+    "first_frame": ("from vision.detector import PersonDetector\n"
+                    "from vision.video_feed import VideoFeed\n"
+                    "frame = VideoFeed({video!r}).get_frame()\n"
+                    "PersonDetector(backend={backend!r}, weights={weights!r}).detect(frame)"),
+}
+
+
+def measure(snippet, timeout=600):
+    """Seconds the snippet takes in a new interpreter, or None if it failed."""
+    code = ("import time\n"
+            "t = time.perf_counter()\n"
+            f"{snippet}\n"
+            f"print({MARK!r} + repr(time.perf_counter() - t), flush=True)\n"
+            "import os; os._exit(0)\n") # don't wait for background threads
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                          timeout=timeout, cwd=os.path.dirname(os.path.abspath(__file__)))
+    for line in proc.stdout.splitlines():
+        if line.startswith(MARK):
+            return float(line[len(MARK):])
+    print(f"    failed: {(proc.stderr.strip().splitlines() or ['no output'])[-1]}", file=sys.stderr)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import and first-frame latency benchmark")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", default=list(SNIPPETS), choices=list(SNIPPETS))
+    parser.add_argument("--video", default="videos/Entrance area.mp4")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--out", help="write results as JSON")
+    parser.add_argument("--compare", help="baseline JSON to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p95 slowdown (0.25 = 25%%)")
+    args = parser.parse_args()
+
+    stages = {}
+    for stage in args.stages:
+        snippet = SNIPPETS[stage].format(video=args.video, backend=args.backend, weights=args.weights)
+        samples = [s for s in (measure(snippet) for _ in range(args.runs)) if s is not None]
+        stages[stage] = summarize(samples)
+        s = stages[stage]
+        if s["n"]:
+            print(f"  {stage:12s} p50 {s['p50_ms']:9.1f} ms  p95 {s['p95_ms']:9.1f} ms  ({s['n']} runs)")
+        else:
+            print(f"  {stage:12s} failed")
+
+    result = {"runs": args.runs, "backend": args.backend, "python": sys.version.split()[0], "stages": stages}
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(result, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"compared with {args.compare}:")
+        if compare(result, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# broadcaster.py
+# One producer publishes its latest JPEG (or {tier: JPEG}), any number of
+# MJPEG clients read it
+import asyncio
+import threading
+
+
+class FrameBroadcaster:
+    def __init__(self):
+        self.cond = threading.Condition()
+        self.frame = None
+        self.seq = 0
+        self.closed = False
+        self.clients = 0
+        self.tiers = {} # tier -> clients watching it
+        self.waiters = set() # asyncio futures of async clients waiting for the next frame
+
+    def publish(self, frame):
+        with self.cond:
+            self.frame = frame
+            self.seq += 1
+            self.cond.notify_all()
+            waiters, self.waiters = self.waiters, set()
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_wake, fut)
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+            waiters, self.waiters = self.waiters, set()
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_wake, fut)
+
+    def wait_next(self, last_seq, timeout=1.0):
+        """
+        Blocks until a frame newer than last_seq is available.
+        Returns (seq, frame), or (last_seq, None) on timeout / close.
+        A slow client simply gets the newest frame and skips the ones in between.
+        """
+        with self.cond:
+            if self.seq <= last_seq and not self.closed:
+                self.cond.wait_for(lambda: self.seq > last_seq or self.closed, timeout)
+            if self.seq > last_seq:
+                return self.seq, self.frame
+            return last_seq, None
+
+    def watched(self):
+        """Tiers with at least one client, so the producer only encodes those."""
+        with self.cond:
+            return list(self.tiers)
+
+    def subscribe(self, tier=None):
+        """
+        Generator of frames for one client; never blocks the producer.
+        tier: key into published {tier: frame} dicts, None for plain frames
+        """
+        self._join(tier)
+        try:
+            last_seq = 0
+            while True:
+                last_seq, frame = self.wait_next(last_seq)
+                if frame is None:
+                    if self.closed:
+                        return
+                    continue
+                if tier is not None:
+                    frame = frame.get(tier)
+                    if frame is None:
+                        continue # tier was not encoded yet for this frame
+                yield frame
+        finally:
+            self._leave(tier)
+
+    async def asubscribe(self, tier=None, timeout=1.0):
+        """Same as subscribe() but waits on the event loop, so idle clients hold no thread."""
+        loop = asyncio.get_running_loop()
+        self._join(tier)
+        try:
+            last_seq = 0
+            while True:
+                with self.cond:
+                    if self.seq > last_seq:
+                        last_seq, frame = self.seq, self.frame
+                    elif self.closed:
+                        return
+                    else:
+                        frame = None
+                        fut = loop.create_future()
+                        self.waiters.add((loop, fut))
+                if frame is None:
+                    try:
+                        await asyncio.wait_for(fut, timeout)
+                    except asyncio.TimeoutError:
+                        with self.cond:
+                            self.waiters.discard((loop, fut))
+                    continue
+                if tier is not None:
+                    frame = frame.get(tier)
+                    if frame is None:
+                        continue
+                yield frame
+        finally:
+            self._leave(tier)
+
+    def _join(self, tier):
+        with self.cond:
+            self.clients += 1
+            if tier is not None:
+                self.tiers[tier] = self.tiers.get(tier, 0) + 1
+
+    def _leave(self, tier):
+        with self.cond:
+            self.clients -= 1
+            if tier is not None:
+                self.tiers[tier] -= 1
+                if not self.tiers[tier]:
+                    del self.tiers[tier]
+
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
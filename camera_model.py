@@ -3,8 +3,9 @@
 # models/camera_model.py
 
 class Camera:
-    def __init__(self, name, source):
+    def __init__(self, name, source, backend="torch"):
         self.id=id
         self.name = name
         self.source=source
+        self.backend = backend # inference backend, see vision/backends.py
         self.status = "Active"
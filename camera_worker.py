@@ -0,0 +1,375 @@
+# camera_worker.py
+# Runs one camera's analysis in its own process, so drawing, tracking and
+# Python loops of one camera never contend for the web process's GIL.
+# The worker also JPEG-encodes the stream tiers someone is watching; the bytes
+# come back through a shared-memory ring of slots (no pickling), counts,
+# track ids and zone bits through a small queue. CameraProcess relays both
+# to the web side, which only copies them out, and restarts crashed workers.
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+
+from .jpeg_tiers import encode_tiers
+from .metrics import WORKER_RESTARTS
+
+MAX_SHAPE = (1080, 1920, 3) # larger frames are scaled down to fit a slot
+RECONNECT_ATTEMPTS = 3 # failed reads of a live source before the worker exits to be restarted
+SLOT_HEADER = np.dtype([("seq", np.int64), ("h", np.int32), ("w", np.int32), ("n", np.int64)])
+
+
+def draw_annotations(frame, boxes, objects, raster, active_zones):
+    """Boxes, track ids, zone outlines and ALERT labels, drawn in place."""
+    for (x1, y1, x2, y2) in boxes:
+        cv2.rectangle(frame, (x1,y1), (x2,y2), (255,0,0), 2)
+
+    for obj_id, (cx, cy) in objects.items():
+        cv2.circle(frame, (cx,cy), 4, (0,255,0), -1)
+        cv2.putText(frame, f"ID {obj_id}", (cx+5, cy-5),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0,255,0), 2)
+
+    for zone in active_zones:
+        if zone not in raster.names:
+            continue
+        x1, y1 = raster.anchors[raster.names.index(zone)]
+        cv2.putText(frame, f"ALERT {zone}!", (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+
+    for name, poly, (x1, y1) in zip(raster.names, raster.polygons, raster.anchors):
+        cv2.polylines(frame, [poly], True, (0,0,255), 2)
+        cv2.putText(frame, name, (x1,y1-5),
+                    cv2.FONT_HERSHEY_SIMPLEX,0.5,(0,0,255),2)
+
+
+class FrameRing:
+    """
+    `slots` uint8 frames of up to max_shape in one shared-memory block, each
+    with a (seq, h, w, n) header; a slot can hold n payload bytes (encoded
+    JPEGs) instead of a frame. The writer marks a slot busy (seq = -1) while
+    copying; a reader checks seq before and after its copy, so a frame that
+    was overwritten mid-read is discarded instead of returned torn.
+    """
+
+    def __init__(self, slots=4, max_shape=MAX_SHAPE, name=None):
+        self.slots = slots
+        self.max_shape = tuple(max_shape)
+        self.slot_bytes = int(np.prod(max_shape))
+        header_bytes = SLOT_HEADER.itemsize * slots
+        self.owner = name is None
+        if self.owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=header_bytes + self.slot_bytes * slots)
+        else:
+            try:
+                # the creating process owns the block; don't let this one's tracker unlink it
+                self.shm = shared_memory.SharedMemory(name=name, track=False)
+            except TypeError: # Python < 3.13
+                self.shm = shared_memory.SharedMemory(name=name)
+        self.headers = np.ndarray((slots,), SLOT_HEADER, self.shm.buf, 0)
+        self.data = np.ndarray((slots, self.slot_bytes), np.uint8, self.shm.buf, header_bytes)
+        if self.owner:
+            self.headers["seq"] = 0
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def fit(self, frame):
+        """Scales a frame down (keeping its aspect ratio) if it would not fit a slot."""
+        h, w = frame.shape[:2]
+        scale = min(self.max_shape[0] / h, self.max_shape[1] / w)
+        if scale >= 1:
+            return frame
+        return cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+
+    def write(self, seq, frame):
+        i = seq % self.slots
+        h, w = frame.shape[:2]
+        self.headers["seq"][i] = -1
+        self.data[i, :frame.nbytes] = np.ascontiguousarray(frame).reshape(-1)
+        self.headers["h"][i] = h
+        self.headers["w"][i] = w
+        self.headers["n"][i] = frame.nbytes
+        self.headers["seq"][i] = seq
+
+    def write_bytes(self, seq, payload):
+        """Stores raw bytes in place of a frame; False if they don't fit a slot."""
+        if len(payload) > self.slot_bytes:
+            return False
+        i = seq % self.slots
+        self.headers["seq"][i] = -1
+        self.data[i, :len(payload)] = np.frombuffer(payload, np.uint8)
+        self.headers["h"][i] = self.headers["w"][i] = 0
+        self.headers["n"][i] = len(payload)
+        self.headers["seq"][i] = seq
+        return True
+
+    def read(self, seq):
+        """Copy of frame `seq`, or None if its slot has been reused since."""
+        i = seq % self.slots
+        if self.headers["seq"][i] != seq:
+            return None
+        h, w = int(self.headers["h"][i]), int(self.headers["w"][i])
+        frame = self.data[i, :h * w * 3].reshape(h, w, 3).copy()
+        if self.headers["seq"][i] != seq:
+            return None
+        return frame
+
+    def read_bytes(self, seq):
+        """Copy of the bytes stored for `seq`, or None if its slot has been reused since."""
+        i = seq % self.slots
+        if self.headers["seq"][i] != seq:
+            return None
+        payload = self.data[i, :int(self.headers["n"][i])].tobytes()
+        if self.headers["seq"][i] != seq:
+            return None
+        return payload
+
+    def close(self):
+        self.headers = self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+# ---------------- WORKER PROCESS ----------------
+def worker_main(camera, source, backend, ring_name, slots, max_shape, messages, control,
+                zones, active_zones, tiers, detect_every, roi, threads):
+    if threads:
+        # pin before the backends import torch/onnxruntime, like batch_process.init_worker
+        os.environ["OMP_NUM_THREADS"] = str(threads)
+        cv2.setNumThreads(1)
+        if backend == "torch":
+            import torch
+            torch.set_num_threads(threads)
+            torch.set_num_interop_threads(1)
+    from .detector import PersonDetector
+    from .heatmap import HeatMap
+    from .model_pool import configure
+    from .motion import MotionPredictor
+    from .roi import ROIDetector
+    from .tracker import SimpleTracker
+    from .zone_raster import ZoneRaster, bits_to_membership, zone_polygon
+
+    ring = FrameRing(slots, max_shape, name=ring_name)
+    configure(workers=1, threads=threads) # one inference worker per camera process
+    detector = PersonDetector(backend=backend, threads=threads)
+    detect_batch = detector.detect_batch
+    roi_detector = None
+    if roi:
+        roi_detector = ROIDetector(detector.detect_batch, margin=32)
+        roi_detector.set_regions([zone_polygon(z) for z in zones])
+        detect_batch = roi_detector.detect_batch
+
+    # only a video file really ends; a camera or stream that stops delivering is a failure
+    live = not (isinstance(source, str) and os.path.isfile(source))
+    cap = cv2.VideoCapture(source)
+    failures = 0
+    tracker = SimpleTracker()
+    motion = MotionPredictor()
+    raster = heatmap = None
+    active = set(active_zones)
+    tiers = list(tiers)
+    seq = 0
+    try:
+        while True:
+            while True:
+                try:
+                    kind, value = control.get_nowait()
+                except queue.Empty:
+                    break
+                if kind == "stop":
+                    return
+                if kind == "zones":
+                    zones = value
+                    if roi_detector is not None:
+                        roi_detector.set_regions([zone_polygon(z) for z in zones])
+                elif kind == "alerts":
+                    active = set(value)
+                elif kind == "tiers":
+                    tiers = list(value)
+
+            ret, frame = cap.read()
+            if not ret:
+                if not live:
+                    return # file ended: a clean exit, not restarted
+                failures += 1
+                if failures > RECONNECT_ATTEMPTS:
+                    raise SystemExit(1) # non-zero: relay() restarts us with backoff
+                cap.release()
+                time.sleep(1.0)
+                cap = cv2.VideoCapture(source)
+                continue
+            failures = 0
+            if raster is None:
+                raster = ZoneRaster(frame.shape)
+                heatmap = HeatMap(frame.shape)
+
+            if seq % detect_every == 0:
+                boxes = detect_batch([frame])[0]
+                objects = tracker.update(boxes)
+                motion.observe(tracker.boxes)
+            else:
+                # between keyframes: carry the tracks forward at constant velocity
+                predicted = motion.predict()
+                boxes = list(predicted.values())
+                objects = {i: ((x1+x2)//2, (y1+y2)//2) for i, (x1, y1, x2, y2) in predicted.items()}
+
+            raster.compile(zones)
+            bits = raster.lookup(list(objects.values()))
+            counts = bits_to_membership(bits, len(raster.names)).sum(axis=0).tolist()
+            draw_annotations(frame, boxes, objects, raster, active)
+            heatmap.update(objects)
+            frame = heatmap.draw(frame)
+
+            seq += 1
+            layout = []
+            if tiers:
+                # analyzed in source coordinates; only the streamed copy is scaled down
+                jpegs = encode_tiers(ring.fit(frame), tiers)
+                if ring.write_bytes(seq, b"".join(jpegs.values())):
+                    layout = [(tier, len(jpeg)) for tier, jpeg in jpegs.items()]
+            try:
+                messages.put_nowait({
+                    "seq": seq,
+                    "time": time.time(),
+                    "ids": np.fromiter(objects.keys(), dtype=np.int64, count=len(objects)),
+                    "bits": bits,
+                    "names": tuple(raster.names),
+                    "counts": dict(zip(raster.names, counts)),
+                    "jpegs": layout, # (tier, length) of the JPEGs in this seq's ring slot
+                    "model": detector.pool.get_stats(), # the web process can't see this pool
+                })
+            except queue.Full:
+                pass # the web side is behind; it only ever needs the latest state
+    finally:
+        cap.release()
+        ring.close()
+
+
+# ---------------- WEB SIDE ----------------
+class CameraProcess:
+    """Starts, relays and supervises one camera's worker process."""
+
+    def __init__(self, camera, source, backend="torch", zones=(), detect_every=3, roi=True, threads=None,
+                 slots=4, max_shape=MAX_SHAPE, restart_delay=1.0, max_restart_delay=30.0):
+        self.camera = camera
+        self.source = source
+        self.backend = backend
+        self.zones = list(zones)
+        self.active = []
+        self.tiers = []
+        self.detect_every = detect_every
+        self.roi = roi
+        self.threads = threads
+        self.restart_delay = restart_delay
+        self.max_restart_delay = max_restart_delay
+        self.ctx = mp.get_context("spawn")
+        self.ring = FrameRing(slots, max_shape)
+        self.process = None
+        self.messages = None
+        self.control = None
+        self.restarts = 0
+        self.relayed = 0
+        self.missed_frames = 0 # results whose frame slot was reused before we read it
+        self.model = None # the worker's last reported pool stats
+        self.stopping = threading.Event()
+
+    def _spawn(self):
+        # fresh queues: a worker killed mid-put can leave a queue unusable
+        self.model = None # a new worker loads its own model
+        self.messages = self.ctx.Queue(maxsize=64)
+        self.control = self.ctx.Queue()
+        self.process = self.ctx.Process(
+            target=worker_main, name=f"camera-{self.camera}", daemon=True,
+            args=(self.camera, self.source, self.backend, self.ring.name, self.ring.slots,
+                  self.ring.max_shape, self.messages, self.control, self.zones, self.active,
+                  self.tiers, self.detect_every, self.roi, self.threads))
+        self.process.start()
+
+    def start(self):
+        self._spawn()
+        return self
+
+    def send(self, kind, value):
+        """
+        ("zones", zones), ("alerts", active zone names) or ("tiers", stream
+        tiers to encode); remembered for restarts.
+        """
+        if kind == "zones":
+            self.zones = list(value)
+        elif kind == "alerts":
+            self.active = list(value)
+        elif kind == "tiers":
+            self.tiers = list(value)
+        if self.control is None:
+            return
+        try:
+            self.control.put_nowait((kind, value))
+        except (ValueError, OSError):
+            pass # worker is being restarted; it starts with the remembered state
+
+    def relay(self, on_result):
+        """
+        Calls on_result(message, jpegs) for every worker result, where jpegs
+        is {tier: bytes} for the tiers last sent with send("tiers", ...) (None
+        if none were encoded, or their slot was overwritten before we got to
+        it), until stop() or the source file ends; restarts the worker with exponential backoff when it dies
+        (including a live source it could not reconnect to).
+        """
+        delay = self.restart_delay
+        while not self.stopping.is_set():
+            try:
+                msg = self.messages.get(timeout=0.5)
+            except queue.Empty:
+                if self.process.is_alive() or self.stopping.is_set():
+                    continue
+                if self.process.exitcode == 0:
+                    return
+                self.restarts += 1
+                WORKER_RESTARTS.inc(camera=self.camera)
+                if self.stopping.wait(delay):
+                    return
+                delay = min(delay * 2, self.max_restart_delay)
+                self._spawn()
+                continue
+            delay = self.restart_delay
+            jpegs = None
+            if msg["jpegs"]:
+                payload = self.ring.read_bytes(msg["seq"])
+                if payload is None:
+                    self.missed_frames += 1
+                else:
+                    jpegs, at = {}, 0
+                    for tier, length in msg["jpegs"]:
+                        jpegs[tier] = payload[at:at + length]
+                        at += length
+            self.relayed += 1
+            self.model = msg.get("model")
+            on_result(msg, jpegs)
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        if self.process is not None and self.process.is_alive():
+            self.send("stop", None)
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+                self.process.join(timeout)
+
+    def close(self):
+        self.ring.close()
+
+    def get_stats(self):
+        return {
+            "pid": self.process.pid if self.process else None,
+            "alive": bool(self.process and self.process.is_alive()),
+            "restarts": self.restarts,
+            "relayed": self.relayed,
+            "missed_frames": self.missed_frames,
+            "model": self.model,
+        }
@@ -0,0 +1,119 @@
+# compare_backends.py
+# Accuracy vs speed of the CPU inference backends against the PyTorch path
+# on a sample clip, e.g.:
+#   python compare_backends.py "videos/Entrance area.mp4" --frames 200
+import argparse
+import json
+import time
+
+import cv2
+import numpy as np
+
+from vision.backends import BACKENDS, make_backend
+
+
+def iou_matrix(a, b):
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = (x2 - x1).clip(0) * (y2 - y1).clip(0)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def match(ref, dets, thresh=0.5):
+    """Greedy IoU matching; returns (matched, mean IoU of the matches)."""
+    if len(ref) == 0 or len(dets) == 0:
+        return 0, 0.0
+    iou = iou_matrix(ref[:, :4], dets[:, :4])
+    matched, total = 0, 0.0
+    while True:
+        i, j = np.unravel_index(iou.argmax(), iou.shape)
+        if iou[i, j] < thresh:
+            break
+        matched += 1
+        total += float(iou[i, j]) # a Python float, so --json can serialize the report
+        iou[i, :] = 0
+        iou[:, j] = 0
+    return matched, total / matched if matched else 0.0
+
+
+def read_frames(path, count):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def run(backend, frames, imgsz, conf):
+    backend.predict(frames[:1], imgsz=imgsz, conf=conf, classes=[0]) # warm up
+    times, outputs = [], []
+    for f in frames:
+        start = time.perf_counter()
+        outputs.append(backend.predict([f], imgsz=imgsz, conf=conf, classes=[0])[0])
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000, outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends against the PyTorch path")
+    parser.add_argument("video")
+    parser.add_argument("--weights", default="yolov8n.pt")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, default=640)
+    parser.add_argument("--conf", type=float, default=0.4)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    frames = read_frames(args.video, args.frames)
+    if not frames:
+        raise SystemExit(f"Could not read frames from {args.video}")
+
+    names = ["torch"] + [b for b in args.backends if b != "torch"]
+    reference = None
+    report = {}
+    for name in names:
+        try:
+            backend = make_backend(name, args.weights, calib_sources=[args.video])
+        except ImportError as e:
+            print(f"{name:10s} skipped ({e})")
+            continue
+        ms, outputs = run(backend, frames, args.imgsz, args.conf)
+        if reference is None:
+            reference = outputs
+
+        n_ref = sum(len(r) for r in reference)
+        n_det = sum(len(d) for d in outputs)
+        matched, iou_sum = 0, 0.0
+        for r, d in zip(reference, outputs):
+            m, iou = match(r, d)
+            matched += m
+            iou_sum += iou * m
+        report[name] = {
+            "ms_mean": round(float(ms.mean()), 2),
+            "ms_p95": round(float(np.percentile(ms, 95)), 2),
+            "fps": round(1000.0 / float(ms.mean()), 1),
+            "recall_vs_torch": round(matched / n_ref, 3) if n_ref else 1.0,
+            "precision_vs_torch": round(matched / n_det, 3) if n_det else 1.0,
+            "mean_iou": round(iou_sum / matched, 3) if matched else 0.0,
+        }
+
+    print(f"{'backend':10s} {'ms/frame':>9s} {'p95':>7s} {'fps':>6s} {'recall':>7s} {'prec':>6s} {'IoU':>6s}")
+    for name, r in report.items():
+        print(f"{name:10s} {r['ms_mean']:9.2f} {r['ms_p95']:7.2f} {r['fps']:6.1f} "
+              f"{r['recall_vs_torch']:7.3f} {r['precision_vs_torch']:6.3f} {r['mean_iou']:6.3f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"video": args.video, "frames": len(frames), "results": report}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
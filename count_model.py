@@ -1,7 +1,151 @@
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+
 class Count:
     def __init__(self, id, zone, time):
         self.id = id
         self.zone = zone
         self.time = time
 
-counts = []
\ No newline at end of file
+# one row per (frame, track, zone); zone -1 = tracked but outside every zone
+OBS_DTYPE = np.dtype([
+    ("time", np.float64),
+    ("frame", np.int64),
+    ("track", np.int64),
+    ("zone", np.int32),
+    ("camera", np.int32),
+])
+
+class ObservationLog:
+    """Preallocated ring of per-frame observations with vectorized aggregate views."""
+
+    def __init__(self, capacity=2_000_000):
+        self.buf = np.zeros(capacity, dtype=OBS_DTYPE)
+        self.capacity = capacity
+        self.head = 0 # next write position
+        self.size = 0 # valid rows
+        self.zone_names = []
+        self.zone_ids = {}
+        self.camera_names = []
+        self.camera_ids = {}
+        self.frames = {} # camera -> frames recorded
+        self.latest = {} # camera -> (track ids, zone ids, time) rows of its last frame
+        self.lock = threading.Lock()
+
+    def _id(self, names, ids, name):
+        i = ids.get(name)
+        if i is None:
+            i = ids[name] = len(names)
+            names.append(name)
+        return i
+
+    def record(self, camera, track_ids, inside, zone_names, ts=None):
+        """
+        camera: camera name
+        track_ids: (N,) track ids seen this frame
+        inside: (N, Z) boolean membership matrix from ZoneRaster.membership
+        zone_names: the Z zone names, in column order
+        """
+        ts = time.time() if ts is None else ts
+        track_ids = np.asarray(track_ids, dtype=np.int64)
+        inside = np.asarray(inside, dtype=bool)
+        with self.lock:
+            cam = self._id(self.camera_names, self.camera_ids, camera)
+            zmap = np.array([self._id(self.zone_names, self.zone_ids, z) for z in zone_names] + [-1],
+                            dtype=np.int32)
+            frame = self.frames.get(camera, 0)
+            self.frames[camera] = frame + 1
+
+            rows, cols = np.nonzero(inside)
+            outside = np.flatnonzero(~inside.any(axis=1))
+            tracks = np.concatenate([track_ids[rows], track_ids[outside]])
+            zone = np.concatenate([zmap[cols], np.full(len(outside), -1, dtype=np.int32)])
+            self.latest[camera] = (tracks, zone, ts) # aligned rows, one per track and zone
+
+            n = len(tracks)
+            if n == 0:
+                return
+            if n > self.capacity:
+                tracks, zone, n = tracks[-self.capacity:], zone[-self.capacity:], self.capacity
+            # write into the ring, in at most two slices
+            first = min(n, self.capacity - self.head)
+            for dst, src in ((slice(self.head, self.head + first), slice(0, first)),
+                             (slice(0, n - first), slice(first, n))):
+                view = self.buf[dst]
+                view["time"] = ts
+                view["frame"] = frame
+                view["track"] = tracks[src]
+                view["zone"] = zone[src]
+                view["camera"] = cam
+            self.head = (self.head + n) % self.capacity
+            self.size = min(self.size + n, self.capacity)
+
+    def view(self):
+        """Copy of the valid rows, oldest first."""
+        with self.lock:
+            if self.size < self.capacity:
+                return self.buf[:self.size].copy()
+            return np.concatenate([self.buf[self.head:], self.buf[:self.head]])
+
+    def clear(self):
+        with self.lock:
+            self.head = self.size = 0
+            self.latest.clear()
+
+    # ---------------- CURRENT FRAME ----------------
+    def __len__(self):
+        # people in the latest frame of every camera
+        return sum(len(np.unique(ids)) for ids, _, _ in self.latest.values())
+
+    def __iter__(self):
+        # Count records for the latest frames (one per track and zone)
+        for camera, (ids, zone, ts) in list(self.latest.items()):
+            when = datetime.fromtimestamp(ts)
+            for track, z in zip(ids.tolist(), zone.tolist()):
+                yield Count(track, self.zone_names[z] if z >= 0 else "N/A", when)
+
+    def occupancy(self, camera=None):
+        """{zone: people} over the latest frame of one or all cameras."""
+        totals = np.zeros(len(self.zone_names) + 1, dtype=np.int64)
+        for cam, (_, zone, _) in list(self.latest.items()):
+            if camera is None or cam == camera:
+                totals += np.bincount(zone + 1, minlength=len(totals))[:len(totals)]
+        return {name: int(n) for name, n in zip(self.zone_names, totals[1:])}
+
+    # ---------------- AGGREGATES ----------------
+    def hourly(self, start, end):
+        """
+        Per hour and zone between the two timestamps: unique tracks, peak and
+        average occupancy (over the frames in which the zone was occupied).
+        """
+        rows = self.view()
+        rows = rows[(rows["time"] >= start) & (rows["time"] < end) & (rows["zone"] >= 0)]
+        if len(rows) == 0:
+            return []
+        hour = ((rows["time"] - start) // 3600).astype(np.int64)
+        zone = rows["zone"].astype(np.int64)
+        cam = rows["camera"].astype(np.int64)
+
+        people = np.unique(np.stack([hour, zone, cam, rows["track"]], axis=1), axis=0)
+        hz, unique_people = np.unique(people[:, :2], axis=0, return_counts=True)
+
+        frames, occupancy = np.unique(np.stack([hour, zone, cam, rows["frame"]], axis=1),
+                                      axis=0, return_counts=True)
+        _, inv = np.unique(frames[:, :2], axis=0, return_inverse=True)
+        inv = inv.reshape(-1)
+        peak = np.zeros(len(hz), dtype=np.int64)
+        np.maximum.at(peak, inv, occupancy)
+        mean = np.bincount(inv, weights=occupancy, minlength=len(hz)) / np.bincount(inv, minlength=len(hz))
+
+        return [{
+            "hour": datetime.fromtimestamp(start + 3600 * int(h)),
+            "zone": self.zone_names[int(z)],
+            "unique": int(u),
+            "peak": int(p),
+            "average": round(float(m), 2),
+        } for (h, z), u, p, m in zip(hz, unique_people, peak, mean)]
+
+counts = ObservationLog()
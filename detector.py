@@ -1,15 +1,29 @@
-from ultralytics import YOLO
+from .model_pool import get_pool
+from .metrics import INFERENCE_SECONDS, INFERENCE_BATCH
 
 class PersonDetector:
-    def __init__(self):
-        self.model = YOLO("yolov8n.pt")
+    def __init__(self, backend="torch", weights="yolov8n.pt", calib_sources=None, threads=None):
+        # backend: "torch", "onnx", "onnx-int8" or "openvino" (see backends.py)
+        # the model itself lives in the shared pool (see model_pool.py)
+        self.pool = get_pool(weights, backend, 640, calib_sources=calib_sources, threads=threads)
+        self.label = f"person-{backend}"
 
     def detect(self, frame):
-        results = self.model(frame, conf=0.4, classes=[0], verbose=False)
-        boxes = []
+        return self.detect_batch([frame])[0]
 
-        for r in results:
-            for b in r.boxes:
-                x1, y1, x2, y2 = map(int, b.xyxy[0])
+    def detect_batch(self, frames, imgsz=640):
+        # one forward pass for all frames, one box list back per frame
+        if not frames:
+            return []
+        INFERENCE_BATCH.observe(len(frames), detector=self.label)
+        with INFERENCE_SECONDS.time(detector=self.label):
+            results = self.pool.predict(list(frames), imgsz=imgsz, conf=0.4, classes=[0])
+        batch = []
+
+        for dets in results:
+            boxes = []
+            for d in dets:
+                x1, y1, x2, y2 = map(int, d[:4])
                 boxes.append((x1, y1, x2, y2))
-        return boxes
+            batch.append(boxes)
+        return batch
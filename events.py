@@ -0,0 +1,138 @@
+# events.py
+# Server-Sent Events hub: the analysis loop publishes count deltas and alert
+# transitions, every client reads them from one shared bounded ring with its
+# own cursor (so per-client buffering is bounded and costs O(1) memory)
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+
+
+def sse_frame(event, data, seq=None):
+    lines = []
+    if seq is not None:
+        lines.append(f"id: {seq}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, default=str))
+    return ("\n".join(lines) + "\n\n").encode()
+
+
+HEARTBEAT = b": ping\n\n"
+
+
+class EventHub:
+    def __init__(self, buffer=256, heartbeat=15.0, snapshot=None):
+        """
+        buffer: events kept for clients that fall behind; a client that lags
+                further than this gets a fresh "snapshot" event instead
+        heartbeat: seconds of silence after which a keep-alive comment is sent
+        snapshot: fn() -> dict with the full current state, sent on connect/resync
+        """
+        self.cond = threading.Condition()
+        self.ring = deque(maxlen=buffer) # (seq, frame bytes)
+        self.seq = 0
+        self.heartbeat = heartbeat
+        self.snapshot = snapshot
+        self.clients = 0
+        self.waiters = set() # asyncio futures of async clients waiting for the next event
+
+    def publish(self, event, data):
+        with self.cond:
+            self.seq += 1
+            frame = sse_frame(event, data, self.seq)
+            self.ring.append((self.seq, frame))
+            self.cond.notify_all()
+            waiters, self.waiters = self.waiters, set()
+        for loop, fut in waiters:
+            loop.call_soon_threadsafe(_wake, fut)
+
+    def _snapshot_frame(self):
+        return sse_frame("snapshot", self.snapshot() if self.snapshot else {}, self.seq)
+
+    def _collect(self, cursor):
+        """Frames after cursor, or a snapshot if the client fell out of the ring."""
+        if cursor >= self.seq:
+            return cursor, []
+        if not self.ring or cursor < self.ring[0][0] - 1:
+            return self.seq, [self._snapshot_frame()]
+        return self.seq, [f for s, f in self.ring if s > cursor]
+
+    def _start(self, last_id):
+        try:
+            cursor = int(last_id)
+        except (TypeError, ValueError):
+            cursor = None
+        if cursor is None or cursor > self.seq:
+            return self.seq, [b"retry: 3000\n\n", self._snapshot_frame()]
+        return cursor, [b"retry: 3000\n\n"]
+
+    # ---------------- THREADED CLIENTS (Flask / WSGI) ----------------
+    def stream(self, last_id=None):
+        """Generator of SSE bytes for one client; resumes from Last-Event-ID when given."""
+        with self.cond:
+            self.clients += 1
+            cursor, frames = self._start(last_id)
+        try:
+            for f in frames:
+                yield f
+            while True:
+                with self.cond:
+                    if self.seq <= cursor:
+                        self.cond.wait(self.heartbeat)
+                    cursor, frames = self._collect(cursor)
+                if not frames:
+                    yield HEARTBEAT
+                for f in frames:
+                    yield f
+        finally:
+            with self.cond:
+                self.clients -= 1
+
+    # ---------------- ASYNC CLIENTS (ASGI) ----------------
+    async def astream(self, last_id=None):
+        """Same as stream() but waits on the event loop, so idle clients hold no thread."""
+        loop = asyncio.get_running_loop()
+        with self.cond:
+            self.clients += 1
+            cursor, frames = self._start(last_id)
+        try:
+            for f in frames:
+                yield f
+            while True:
+                with self.cond:
+                    cursor, frames = self._collect(cursor)
+                    if not frames:
+                        fut = loop.create_future()
+                        self.waiters.add((loop, fut))
+                if not frames:
+                    try:
+                        await asyncio.wait_for(fut, self.heartbeat)
+                    except asyncio.TimeoutError:
+                        yield HEARTBEAT
+                    continue
+                for f in frames:
+                    yield f
+        finally:
+            with self.cond:
+                self.clients -= 1
+
+
+def _wake(fut):
+    if not fut.done():
+        fut.set_result(None)
+
+
+class DeltaPublisher:
+    """Publishes only the zones whose count changed since the last frame."""
+
+    def __init__(self, hub, camera):
+        self.hub = hub
+        self.camera = camera
+        self.last = {}
+
+    def update(self, counts):
+        delta = {z: n for z, n in counts.items() if self.last.get(z) != n}
+        if delta:
+            self.hub.publish("counts", {"camera": self.camera, "counts": delta, "time": time.time()})
+        self.last = dict(counts)
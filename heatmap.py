@@ -2,20 +2,61 @@ import cv2
 import numpy as np
 
 class HeatMap:
-    def __init__(self, shape):
+    def __init__(self, shape, scale=0.25, half_life=None, render_every=10, change_ratio=0.05, blur=31):
+        """
+        shape: frame shape the overlay is drawn on
+        scale: accumulation resolution relative to the frame (0.25 = quarter size)
+        half_life: frames after which old heat has faded to half; None keeps it forever
+        render_every: re-render the colored overlay at least every N frames...
+        change_ratio: ...or sooner once this fraction of new heat has been added
+        """
         self.h, self.w = shape[:2]
-        self.map = np.zeros((self.h, self.w), dtype=np.float32)
+        self.scale = scale
+        self.sh, self.sw = max(1, int(self.h * scale)), max(1, int(self.w * scale))
+        self.map = np.zeros((self.sh, self.sw), dtype=np.float32)
+        self.decay = 0.5 ** (1.0 / half_life) if half_life else 1.0
 
-    def update(self, objects):
-        for _, (x, y) in objects.items():
-            if 0 <= x < self.w and 0 <= y < self.h:
-                self.map[y, x] += 10 # 🔴 increase intensity
+        k = max(3, int(blur * scale))
+        self.ksize = k if k % 2 else k + 1
+        self.render_every = render_every
+        self.change_ratio = change_ratio
 
-    def draw(self, frame):
-        heat = cv2.GaussianBlur(self.map, (31,31), 0)
+        self.overlay = None # cached colored layer at frame size
+        self.frames_since_render = 0
+        self.added_since_render = 0.0
+
+    def update(self, objects, weight=10):
+        # objects: {id: (x, y)} from a tracker, or an (N, 2) array of points
+        if isinstance(objects, dict):
+            objects = list(objects.values())
+        if self.decay < 1.0:
+            self.map *= self.decay
+
+        pts = np.asarray(objects, dtype=np.float32).reshape(-1, 2)
+        if len(pts) == 0:
+            return
+        x = (pts[:, 0] * self.scale).astype(np.int32)
+        y = (pts[:, 1] * self.scale).astype(np.int32)
+        ok = (x >= 0) & (x < self.sw) & (y >= 0) & (y < self.sh)
+        np.add.at(self.map, (y[ok], x[ok]), weight) # 🔴 increase intensity
+        self.added_since_render += weight * int(ok.sum())
+
+    def render(self):
+        heat = cv2.GaussianBlur(self.map, (self.ksize, self.ksize), 0)
         heat = cv2.normalize(heat, None, 0, 255, cv2.NORM_MINMAX)
         heat = heat.astype(np.uint8)
-        heat = cv2.applyColorMap(heat, cv2.COLORMAP_JET)
+        heat = cv2.resize(heat, (self.w, self.h), interpolation=cv2.INTER_LINEAR)
+        self.overlay = cv2.applyColorMap(heat, cv2.COLORMAP_JET)
+        self.frames_since_render = 0
+        self.added_since_render = 0.0
+        return self.overlay
+
+    def draw(self, frame):
+        self.frames_since_render += 1
+        total = float(self.map.sum())
+        changed = total > 0 and self.added_since_render / total >= self.change_ratio
+        if self.overlay is None or changed or self.frames_since_render >= self.render_every:
+            self.render()
 
         # 🔴 strong overlay
-        return cv2.addWeighted(frame, 0.6, heat, 0.4, 0)
\ No newline at end of file
+        return cv2.addWeighted(frame, 0.6, self.overlay, 0.4, 0)
@@ -0,0 +1,41 @@
+# jpeg_tiers.py
+# Resolution/quality tiers for the MJPEG streams: each annotated frame is
+# encoded once per tier that at least one client is watching, and the bytes
+# are shared by every client of that tier
+import cv2
+
+SIZES = {"full": 1.0, "half": 0.5, "thumb": 0.25}
+QUALITIES = {"high": 90, "low": 50}
+DEFAULT_TIER = ("full", "high")
+
+
+def parse_tier(size=None, quality=None):
+    """Query parameters -> (size, quality), or None if either is unknown."""
+    tier = (size or DEFAULT_TIER[0], quality or DEFAULT_TIER[1])
+    if tier[0] not in SIZES or tier[1] not in QUALITIES:
+        return None
+    return tier
+
+
+def encode_tier(frame, tier, resized=None):
+    size, quality = tier
+    img = resized.get(size) if resized is not None else None
+    if img is None:
+        scale = SIZES[size]
+        img = frame if scale == 1.0 else cv2.resize(frame, None, fx=scale, fy=scale,
+                                                    interpolation=cv2.INTER_AREA)
+        if resized is not None:
+            resized[size] = img
+    ret, buffer = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, QUALITIES[quality]])
+    return buffer.tobytes() if ret else None
+
+
+def encode_tiers(frame, tiers):
+    """{tier: jpeg bytes} for the given tiers; each size is resized only once."""
+    resized = {}
+    out = {}
+    for tier in tiers:
+        jpeg = encode_tier(frame, tier, resized)
+        if jpeg is not None:
+            out[tier] = jpeg
+    return out
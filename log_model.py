@@ -1,10 +1,49 @@
+import json
+import os
+from collections import deque
 from datetime import datetime
-logs = []
+
+MAX_LOGS = 1000 # alerts kept in memory; older ones only live in LOG_FILE
+LOG_FILE = None # optional append-only JSON-lines file, see enable_persistence()
+
+logs = deque(maxlen=MAX_LOGS)
 
 class Log:
-    def __init__(self, message, time=None):
+    def __init__(self, message, time=None, camera=None, zone=None, count=None, threshold=None, status=None):
         self.message = message
         self.time = time if time else datetime.now()
+        self.camera = camera
+        self.zone = zone
+        self.count = count
+        self.threshold = threshold
+        self.status = status
+
+    def to_dict(self):
+        d = dict(self.__dict__)
+        d["time"] = self.time.isoformat()
+        return d
+
+def add_alert(message, **fields):
+    entry = Log(message, **fields)
+    logs.append(entry)
+    if LOG_FILE:
+        with open(LOG_FILE, "a") as f:
+            f.write(json.dumps(entry.to_dict(), default=str) + "\n")
+    return entry
 
-def add_alert(message):
-    logs.append(Log(message))
+def enable_persistence(path):
+    # reload the newest MAX_LOGS entries, then keep appending to the file
+    global LOG_FILE
+    LOG_FILE = path
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        for line in deque(f, maxlen=MAX_LOGS):
+            try:
+                d = json.loads(line)
+            except ValueError:
+                continue
+            d["time"] = datetime.fromisoformat(d["time"])
+            logs.append(Log(**d))
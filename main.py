@@ -1,32 +1,68 @@
 import cv2
 import json
+import sys
 import threading
 import numpy as np
-import pandas as pd
 import time
-from flask import Flask, render_template, jsonify, send_file
-from ultralytics import YOLO
+from flask import Flask, render_template, jsonify, send_file, Response, request
 from io import BytesIO
-from matplotlib.backends.backend_pdf import PdfPages
-import matplotlib.pyplot as plt
+
+from vision.zone_raster import ZoneRaster
+from vision.heatmap import HeatMap
+from vision.model_pool import get_pool
+from vision.motion import MotionPredictor
+from vision.tracker import SimpleTracker
+from vision.video_feed import VideoFeed
+from vision.timeseries import TimeSeriesStore
+from vision.snapshot import SnapshotPublisher
+from vision.events import EventHub, DeltaPublisher
+from vision.alerts import AlertEngine
+from vision.metrics import FpsMeter, FRAME_AGE, FRAME_SECONDS, SOURCE_FPS, STORE_ITEMS, render as render_metrics
 
 # ---------------- CONFIG ----------------
-VIDEO_FILE = "videos/Entrance area.mp4"
+VIDEO_FILE = "videos/Entrance area.mp4" # or a camera index / rtsp:// URL
 ZONE_FILE = "zones.json"
+HISTORY_DB = "data/history.db"
 THRESHOLD = 4
+DETECT_EVERY = 3 # YOLO on every k-th frame, tracks predicted in between
+ANALYSIS_FPS = None # e.g. 10: analyze only that many frames per second of video, skip the rest undecoded
+HEATMAP_HALF_LIFE = 750 # frames (~30 s at 25 fps)
+RECONNECT_DELAY = 2.0 # seconds between attempts to reopen a live source that dropped
 
 app = Flask(__name__)
-model = YOLO("yolov8n.pt", verbose=False)
+# created by start(), so importing this module opens no model, database or thread
+model = None
+history = None
 
 zone_data = {}
 zone_names = ["Entrance", "Exit", "Common"]
 
-counts = {"Entrance": 0, "Exit": 0, "Common": 0}
-heatmap = {"Entrance": None, "Exit": None, "Common": None}
+# latest counts + alert text, published once per frame by video_loop
+snapshot = SnapshotPublisher({"Entrance": 0, "Exit": 0, "Common": 0, "alert": ""})
+
+def live_state():
+    data = snapshot.get().data
+    return {"counts": {"main": {z: data[z] for z in zone_names}}, "alerts": sorted(alert_engine.active("main"))}
+
+# pushes count deltas and alert transitions to /events clients
+events = EventHub(snapshot=live_state)
+# "crowded" = more than THRESHOLD people, held for a moment, with hysteresis
+alert_engine = AlertEngine(hysteresis=1, min_duration=2.0)
+crowd_limits = [{"zone": z, "value": THRESHOLD + 1} for z in zone_names]
+heatmap = None
+first_frame = threading.Event() # set once video_loop has analyzed a frame (see /ready)
 
-history = []
 start_time = time.time()
 
+
+def start():
+    global model, history
+    # shared, thread-pinned inference workers (model_pool.py); loads and warms up in the background
+    model = get_pool("yolov8n.pt")
+    # occupancy samples: ring buffer in memory, rolled up and persisted to SQLite
+    history = TimeSeriesStore(HISTORY_DB).start()
+    STORE_ITEMS.set_function(lambda: len(history), store="history")
+
 # ---------- ZONE DRAW ----------
 drawing = False
 ix, iy = -1, -1
@@ -55,42 +91,79 @@ def load_zones():
 
 # ---------- VIDEO LOOP ----------
 def video_loop():
-    global counts, heatmap
+    global heatmap
 
     load_zones()
-    cap = cv2.VideoCapture(VIDEO_FILE)
+    # live sources: only ever analyze the newest frame, never a backlog
+    live = isinstance(VIDEO_FILE, int) or VIDEO_FILE.startswith(("rtsp://", "rtmp://", "http://", "https://"))
 
-    for z in zone_names:
-        heatmap[z] = np.zeros((480, 640), dtype=np.float32)
+    def open_feed():
+        return VideoFeed(VIDEO_FILE, target_fps=ANALYSIS_FPS, size=(640, 480), loop=not live, latest=live)
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-            continue
-
-        frame = cv2.resize(frame, (640, 480))
-        results = model.track(frame, persist=True, classes=[0])
+    feed = open_feed()
+    SOURCE_FPS.set_function(lambda: feed.source_fps or 0, camera="main")
 
-        for z in zone_names:
-            counts[z] = 0
+    # one running map for all zones, decayed and rendered incrementally
+    heatmap = HeatMap((480, 640), half_life=HEATMAP_HALF_LIFE)
+    raster = ZoneRaster((480, 640))
+    tracker = SimpleTracker()
+    motion = MotionPredictor()
+    fps = FpsMeter("main")
+    deltas = DeltaPublisher(events, "main")
+    frame_idx = 0
 
-        if results and results[0].boxes.id is not None:
-            for box, tid in zip(results[0].boxes.xyxy, results[0].boxes.id):
-                x1, y1, x2, y2 = map(int, box)
-                cx, cy = (x1+x2)//2, (y1+y2)//2
-
-                cv2.rectangle(frame, (x1,y1), (x2,y2), (0,255,0), 2)
-                cv2.circle(frame, (cx,cy), 4, (0,255,0), -1)
-                cv2.putText(frame, f"ID {int(tid)}", (x1,y1-5),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+    while True:
+        frame = feed.get_frame()
+        if frame is None:
+            if not live:
+                break # even a looping file can fail to rewind or decode
+            # the stream dropped (feed.ended): get_frame() would return None forever
+            feed.release()
+            while True:
+                time.sleep(RECONNECT_DELAY)
+                try:
+                    feed = open_feed()
+                    break
+                except Exception:
+                    pass # still unreachable
+            continue
 
-                for z in zone_names:
-                    if z in zone_data:
-                        zx1, zy1, zx2, zy2 = zone_data[z]
-                        if zx1 < cx < zx2 and zy1 < cy < zy2:
-                            counts[z] += 1
-                            heatmap[z][cy, cx] += 2
+        start = time.perf_counter()
+        if frame_idx % DETECT_EVERY == 0:
+            dets = model.predict([frame], classes=[0])[0]
+            tracker.update([tuple(map(int, d[:4])) for d in dets])
+            tracks = dict(tracker.boxes)
+            motion.observe(tracks)
+        else:
+            # cheap constant-velocity prediction between detector keyframes
+            tracks = motion.predict()
+        frame_idx += 1
+
+        # per-frame counts; readers only ever see the published snapshot
+        counts = {z: 0 for z in zone_names}
+
+        centroids = []
+        for tid, (x1, y1, x2, y2) in tracks.items():
+            cx, cy = (x1+x2)//2, (y1+y2)//2
+            centroids.append((cx, cy))
+
+            cv2.rectangle(frame, (x1,y1), (x2,y2), (0,255,0), 2)
+            cv2.circle(frame, (cx,cy), 4, (0,255,0), -1)
+            cv2.putText(frame, f"ID {tid}", (x1,y1-5),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
+
+        # one gather over all centroids instead of a loop per track and zone
+        present = [z for z in zone_names if z in zone_data]
+        raster.compile([zone_data[z] for z in present], names=present)
+        in_zones = ()
+        if centroids:
+            pts = np.array(centroids)
+            inside = raster.membership(pts)
+            for j, z in enumerate(raster.names):
+                counts[z] = int(inside[:, j].sum())
+            in_zones = pts[inside.any(axis=1)]
+        # every frame, even an empty one: update() is what decays the map
+        heatmap.update(in_zones, weight=2)
 
         for z in zone_names:
             if z in zone_data:
@@ -100,28 +173,40 @@ def video_loop():
                             cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0,0,255), 2)
 
         # 🔥 HEATMAP OVERLAY FIX
-        combined = np.zeros((480,640), dtype=np.float32)
-        for z in zone_names:
-            combined += heatmap[z]
-
-        combined = cv2.GaussianBlur(combined, (31,31), 0)
-        norm = cv2.normalize(combined, None, 0, 255, cv2.NORM_MINMAX)
-        color = cv2.applyColorMap(norm.astype(np.uint8), cv2.COLORMAP_JET)
-        frame = cv2.addWeighted(frame, 0.6, color, 0.4, 0)
+        frame = heatmap.draw(frame)
 
         # VIDEO ALERT TEXT
+        transitions = alert_engine.update("main", counts, crowd_limits)
+        crowded = alert_engine.active("main")
+        alerts = []
         for i, z in enumerate(zone_names):
-            if counts[z] > THRESHOLD:
+            if z in crowded:
+                alerts.append(f"{z} area is crowded")
                 cv2.putText(frame, f"{z} area is crowded",
                             (10, 30+30*i), cv2.FONT_HERSHEY_SIMPLEX,
                             0.9, (0,0,255), 2)
 
+        snapshot.publish(dict(counts, alert=" | ".join(alerts)))
+        deltas.update(counts)
+        for e in transitions:
+            on = e["state"] == "on"
+            events.publish("alert", dict(
+                e, message=f"{e['zone']} area is crowded" if on else f"{e['zone']} area is clear",
+                time=time.time()
+            ))
+        history.record(dict(counts, crowded=int(bool(alerts))))
+
+        FRAME_SECONDS.observe(time.perf_counter() - start, camera="main")
+        FRAME_AGE.observe(time.perf_counter() - feed.captured, camera="main")
+        fps.tick()
+        first_frame.set()
+
         cv2.imshow("Crowd Analytics", frame)
         if cv2.waitKey(30) & 0xFF == 27:
             break
 
-    cap.release()
-    cv2.destroyAllWindows()
+    feed.release()
+    cv2.destroyAllWindows() # the imshow window above
 
 # ---------- FLASK ----------
 @app.route("/")
@@ -130,29 +215,48 @@ def dashboard():
 
 @app.route("/data")
 def data():
-    alerts = []
-    for z in zone_names:
-        if counts[z] > THRESHOLD:
-            alerts.append(f"{z} area is crowded")
-
-    history.append({
-        "time_sec": int(time.time() - start_time),
-        "Entrance": counts["Entrance"],
-        "Exit": counts["Exit"],
-        "Common": counts["Common"],
-        "crowded": "YES" if alerts else "NO"
-    })
-
-    return jsonify({
-        "Entrance": counts["Entrance"],
-        "Exit": counts["Exit"],
-        "Common": counts["Common"],
-        "alert": " | ".join(alerts)
-    })
+    snap = snapshot.get()
+    if snap.etag in request.if_none_match:
+        return Response(status=304, headers={"ETag": f'"{snap.etag}"'})
+    resp = Response(snap.body, mimetype="application/json")
+    resp.set_etag(snap.etag)
+    resp.headers["Cache-Control"] = "no-cache"
+    return resp
+
+@app.route("/events")
+def event_stream():
+    return Response(events.stream(request.headers.get("Last-Event-ID")),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.route("/ready")
+def ready():
+    # 200 once the model is warm and the first frame has been analyzed, 503 before
+    state = {"model": model.get_stats() if model else {"ready": False}, "first_frame": first_frame.is_set()}
+    ok = state["model"]["ready"] and state["first_frame"]
+    return jsonify(dict(state, ready=ok)), 200 if ok else 503
+
+@app.route("/metrics")
+def metrics():
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
 
 @app.route("/download_csv")
 def download_csv():
-    df = pd.DataFrame(history)
+    # ?hours=N for the last N hours (default: since this run started), ?tier=raw|1s|1m|1h
+    hours = request.args.get("hours", type=float)
+    since = time.time() - hours * 3600 if hours else start_time
+    if history is None:
+        return "history is not recording yet", 503
+    try:
+        rows = history.query(since, tier=request.args.get("tier"))
+    except ValueError as e:
+        return str(e), 400
+    import pandas as pd # only needed for exports; keeps startup fast
+    df = pd.DataFrame([{
+        "time_sec": int(r["ts"] - start_time),
+        **{z: round(r.get(z, 0), 1) for z in zone_names},
+        "crowded": "YES" if r.get("crowded", 0) > 0 else "NO"
+    } for r in rows])
     return send_file(
         BytesIO(df.to_csv(index=False).encode()),
         mimetype="text/csv",
@@ -162,13 +266,18 @@ def download_csv():
 
 @app.route("/download_pdf")
 def download_pdf():
+    # imported on first use; Figure needs no pyplot/GUI state in a request thread
+    from matplotlib.backends.backend_pdf import PdfPages
+    from matplotlib.figure import Figure
+
     buf = BytesIO()
     with PdfPages(buf) as pdf:
-        fig, ax = plt.subplots()
-        ax.bar(counts.keys(), counts.values())
+        fig = Figure()
+        ax = fig.subplots()
+        counts = snapshot.get().data
+        ax.bar(zone_names, [counts[z] for z in zone_names])
         ax.set_title("Crowd Occupancy Summary")
         pdf.savefig(fig)
-        plt.close(fig)
 
     buf.seek(0)
     return send_file(
@@ -178,7 +287,17 @@ def download_pdf():
         as_attachment=True
     )
 
+# ---------------- ASYNC SERVING ----------------
+def event_stream_async():
+    return ("text/event-stream", {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            events.astream(request.headers.get("Last-Event-ID")))
+
+def asgi():
+    from vision.asgi import AsyncServer
+    return AsyncServer(app, {"/events": event_stream_async})
+
 if __name__ == "__main__":
+    start() # the model warms up in the background while zones are drawn
     load_zones()
 
     if not zone_data:
@@ -202,4 +321,8 @@ if __name__ == "__main__":
             cv2.destroyAllWindows()
 
     threading.Thread(target=video_loop, daemon=True).start()
-    app.run(debug=False)
+    if "--asgi" in sys.argv:
+        from vision.asgi import serve
+        serve(asgi())
+    else:
+        app.run(debug=False)
@@ -0,0 +1,163 @@
+# metrics.py
+# Lightweight Prometheus-style counters, gauges and histograms for the hot
+# paths, rendered in the text exposition format at /metrics
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+REGISTRY = []
+
+
+def _escape(value):
+    # label values are user input (camera names); escape them as the text format requires
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_str(names, key, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def remove(self, **labels):
+        with self.lock:
+            self.values.pop(self._key(labels), None)
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, _label_str(self.labelnames, k), v) for k, v in self.values.items()]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {value}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def set_function(self, fn, **labels):
+        # evaluated when /metrics is scraped, e.g. len(history)
+        self.set(fn, **labels)
+
+    def samples(self):
+        out = []
+        for name, labels, v in super().samples():
+            try:
+                out.append((name, labels, v() if callable(v) else v))
+            except Exception:
+                continue
+        return out
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        i = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            h = self.values.get(key)
+            if h is None:
+                h = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        out = []
+        with self.lock:
+            items = [(k, list(h[0]), h[1], h[2]) for k, h in self.values.items()]
+        for key, bucket_counts, total, count in items:
+            cumulative = 0
+            for bound, c in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                out.append((self.name + "_bucket", _label_str(self.labelnames, key, f'le="{le}"'), cumulative))
+            out.append((self.name + "_sum", _label_str(self.labelnames, key), round(total, 6)))
+            out.append((self.name + "_count", _label_str(self.labelnames, key), count))
+        return out
+
+
+def render():
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
+
+
+# ---------------- METRICS ----------------
+FRAMES = Counter("crowdcount_frames_total", "Frames analyzed", ["camera"])
+FRAMES_DROPPED = Counter("crowdcount_frames_dropped_total", "Frames dropped before a stage", ["camera", "stage"])
+CAMERA_FPS = Gauge("crowdcount_camera_fps", "Analyzed frames per second", ["camera"])
+SOURCE_FPS = Gauge("crowdcount_source_fps", "Frame rate of the video source", ["camera"])
+FRAME_SECONDS = Histogram("crowdcount_frame_seconds", "Per-frame analysis time", ["camera"])
+FRAME_AGE = Histogram("crowdcount_frame_age_seconds", "Time from frame capture to its result", ["camera"])
+INFERENCE_SECONDS = Histogram("crowdcount_inference_seconds", "Detector forward pass time", ["detector"])
+INFERENCE_BATCH = Histogram("crowdcount_inference_batch_frames", "Frames per detector call", ["detector"],
+                            buckets=(1, 2, 4, 8, 16, 32))
+STAGE_SECONDS = Histogram("crowdcount_stage_seconds", "Time spent in one pipeline stage", ["camera", "stage"])
+TRACKER_SECONDS = Histogram("crowdcount_tracker_seconds", "Tracker update time", ["tracker"])
+QUEUE_DEPTH = Gauge("crowdcount_queue_depth", "Items waiting in a pipeline queue", ["camera", "stage"])
+STREAM_CLIENTS = Gauge("crowdcount_stream_clients", "Active MJPEG clients", ["camera"])
+WORKER_RESTARTS = Counter("crowdcount_worker_restarts_total", "Camera worker processes restarted after a crash", ["camera"])
+STORE_ITEMS = Gauge("crowdcount_store_items", "Items held in an in-memory store", ["store"])
+
+
+class FpsMeter:
+    """Exponential moving average of the frame rate, published to CAMERA_FPS."""
+
+    def __init__(self, camera, alpha=0.1):
+        self.camera = camera
+        self.alpha = alpha
+        self.last = None
+        self.fps = 0.0
+
+    def tick(self):
+        now = time.perf_counter()
+        if self.last is not None and now > self.last:
+            self.fps += self.alpha * (1.0 / (now - self.last) - self.fps)
+            CAMERA_FPS.set(round(self.fps, 2), camera=self.camera)
+        self.last = now
+        FRAMES.inc(camera=self.camera)
@@ -0,0 +1,213 @@
+# model_pool.py
+# One pool of loaded models per (weights, backend, imgsz), shared by every
+# detector, camera and script in the process. A pool runs a fixed number of
+# inference worker threads, each with its own copy of the model and an
+# explicit intra-op thread count, all fed from one request queue; queued
+# requests with the same settings are coalesced into one forward pass.
+#
+# Sizing: workers x threads should roughly match the cores given to
+# inference. Defaults come from os.cpu_count() and can be overridden with
+# CROWDCOUNT_INFER_WORKERS / CROWDCOUNT_INFER_THREADS or configure().
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+import numpy as np
+
+from .backends import TorchBackend, make_backend
+from .metrics import QUEUE_DEPTH
+
+_STOP = object()
+
+_defaults = {
+    "workers": int(os.environ.get("CROWDCOUNT_INFER_WORKERS", 0)) or None,
+    "threads": int(os.environ.get("CROWDCOUNT_INFER_THREADS", 0)) or None,
+}
+
+
+def configure(workers=None, threads=None):
+    """Default pool size for pools created after this call (e.g. 1 per worker process)."""
+    if workers is not None:
+        _defaults["workers"] = workers
+    if threads is not None:
+        _defaults["threads"] = threads
+
+
+def default_size():
+    cores = os.cpu_count() or 1
+    workers = _defaults["workers"] or max(1, cores // 4)
+    threads = _defaults["threads"] or max(1, cores // workers)
+    return workers, threads
+
+
+_torch_threads = None
+# one model load at a time: exports and INT8 quantization write files
+_load_lock = threading.Lock()
+
+
+def _set_torch_threads(threads):
+    # intra-op threads are a process-wide torch setting
+    global _torch_threads
+    if _torch_threads == threads:
+        return
+    import torch
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass # can only be set before torch's first parallel op
+    _torch_threads = threads
+
+
+class _Request:
+    __slots__ = ("frames", "params", "future")
+
+    def __init__(self, frames, params):
+        self.frames = frames
+        self.params = params
+        self.future = Future()
+
+
+class ModelPool:
+    def __init__(self, weights="yolov8n.pt", backend="torch", imgsz=640, workers=None, threads=None,
+                 calib_sources=None, device="cpu", max_batch=16, warmup=True):
+        default_workers, default_threads = default_size()
+        self.weights = weights
+        self.backend = backend
+        self.imgsz = imgsz
+        self.size = workers or default_workers
+        self.threads = threads or default_threads
+        self.calib_sources = calib_sources
+        self.device = device
+        self.max_batch = max_batch
+        self.warmup = warmup
+        self.label = f"{backend}:{os.path.basename(weights)}:{imgsz}"
+
+        self.requests = queue.Queue()
+        self.lock = threading.Lock()
+        self.loaded = 0
+        self.ready = threading.Event() # set once the first worker has its model loaded and warm
+        self.error = None
+        self.batches = 0
+        self.frames = 0
+        QUEUE_DEPTH.set_function(self.requests.qsize, camera="pool", stage=self.label)
+        self.workers = [threading.Thread(target=self._work, name=f"infer-{self.label}-{i}", daemon=True)
+                        for i in range(self.size)]
+        for t in self.workers:
+            t.start()
+
+    def _load(self):
+        with _load_lock:
+            if self.backend == "torch":
+                _set_torch_threads(self.threads)
+                return TorchBackend(self.weights, self.device)
+            return make_backend(self.backend, self.weights, self.calib_sources, self.threads)
+
+    def _work(self):
+        try:
+            model = self._load()
+            if self.warmup:
+                # first inference allocates buffers and picks kernels; pay for it before any caller does
+                model.predict([np.zeros((self.imgsz, self.imgsz, 3), dtype=np.uint8)], imgsz=self.imgsz)
+        except Exception as e:
+            model = None
+            self.error = e
+        with self.lock:
+            if model is not None:
+                self.loaded += 1
+        self.ready.set()
+
+        carry = None
+        while True:
+            req = carry if carry is not None else self.requests.get()
+            carry = None
+            if req is _STOP:
+                return
+            if model is None:
+                req.future.set_exception(RuntimeError(f"{self.label} failed to load: {self.error}"))
+                continue
+
+            # coalesce whatever else is queued with the same settings
+            batch, n = [req], len(req.frames)
+            while n < self.max_batch:
+                try:
+                    nxt = self.requests.get_nowait()
+                except queue.Empty:
+                    break
+                if nxt is _STOP or nxt.params != req.params:
+                    carry = nxt
+                    break
+                batch.append(nxt)
+                n += len(nxt.frames)
+
+            frames = [f for r in batch for f in r.frames]
+            imgsz, conf, classes = req.params
+            try:
+                results = model.predict(frames, imgsz=imgsz, conf=conf,
+                                        classes=list(classes) if classes is not None else None)
+            except Exception as e:
+                for r in batch:
+                    r.future.set_exception(e)
+                continue
+            with self.lock:
+                self.batches += 1
+                self.frames += len(frames)
+            i = 0
+            for r in batch:
+                r.future.set_result(results[i:i + len(r.frames)])
+                i += len(r.frames)
+
+    def submit(self, frames, imgsz=None, conf=0.25, classes=None):
+        """Queues frames for inference; the Future resolves to one (N, 6) array per frame."""
+        req = _Request(list(frames), (imgsz or self.imgsz, conf, tuple(classes) if classes is not None else None))
+        self.requests.put(req)
+        return req.future
+
+    def predict(self, frames, imgsz=None, conf=0.25, classes=None, timeout=None):
+        """Same result as Backend.predict, served by whichever worker is free."""
+        if not frames:
+            return []
+        return self.submit(frames, imgsz, conf, classes).result(timeout)
+
+    def close(self):
+        for _ in self.workers:
+            self.requests.put(_STOP)
+        for t in self.workers:
+            t.join(timeout=5)
+        QUEUE_DEPTH.remove(camera="pool", stage=self.label)
+
+    def get_stats(self):
+        return {
+            "workers": self.size,
+            "threads": self.threads,
+            "ready": self.ready.is_set() and self.error is None,
+            "loaded": self.loaded,
+            "queued": self.requests.qsize(),
+            "batches": self.batches,
+            "frames": self.frames,
+            "error": str(self.error) if self.error else None,
+        }
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(weights="yolov8n.pt", backend="torch", imgsz=640, **options):
+    """
+    The shared pool for (weights, backend, imgsz), created on first use.
+    options (workers, threads, calib_sources, device, max_batch) only apply
+    when the pool is created.
+    """
+    key = (weights, backend, imgsz)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ModelPool(weights, backend, imgsz, **options)
+    return pool
+
+
+def pools():
+    with _pools_lock:
+        return dict(_pools)
@@ -0,0 +1,38 @@
+# motion.py
+# Constant-velocity prediction of track boxes between detector keyframes
+import numpy as np
+
+class MotionPredictor:
+    def __init__(self, smoothing=0.5):
+        self.smoothing = smoothing
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.last = np.zeros((0, 4), dtype=np.float32) # box at the last keyframe
+        self.vel = np.zeros((0, 4), dtype=np.float32) # per-frame box velocity
+        self.gap = 0 # frames since the last keyframe
+
+    def observe(self, boxes):
+        """
+        Called on keyframes with the detector/tracker output {id: (x1, y1, x2, y2)}.
+        Velocities are estimated per frame over the gap since the previous keyframe.
+        """
+        ids = np.fromiter(boxes.keys(), dtype=np.int64, count=len(boxes))
+        new = np.asarray(list(boxes.values()), dtype=np.float32).reshape(-1, 4)
+        vel = np.zeros_like(new)
+
+        if len(self.ids) and len(ids):
+            order = np.argsort(self.ids)
+            pos = np.searchsorted(self.ids, ids, sorter=order).clip(0, len(self.ids) - 1)
+            prev = order[pos]
+            known = self.ids[prev] == ids
+            step = (new[known] - self.last[prev[known]]) / max(self.gap, 1)
+            a = self.smoothing
+            vel[known] = a * self.vel[prev[known]] + (1 - a) * step
+
+        self.ids, self.last, self.vel = ids, new, vel
+        self.gap = 0
+
+    def predict(self):
+        """Advances every track one frame and returns {id: (x1, y1, x2, y2)}."""
+        self.gap += 1
+        boxes = (self.last + self.vel * self.gap).astype(np.int32)
+        return {int(i): tuple(int(v) for v in b) for i, b in zip(self.ids, boxes)}
@@ -0,0 +1,144 @@
+# pipeline.py
+# Staged capture -> detect -> track -> encode pipeline, one thread per stage
+import queue
+import threading
+import time
+
+from .metrics import FRAMES_DROPPED, QUEUE_DEPTH, STAGE_SECONDS
+
+_END = object() # end-of-stream marker passed down the queues
+
+
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.processed = 0
+        self.dropped = 0
+        self.busy = 0.0 # seconds spent inside the stage function
+        self.queue = None
+
+    def as_dict(self):
+        size = self.queue.qsize() if self.queue is not None else 0
+        maxsize = self.queue.maxsize if self.queue is not None else 0
+        return {
+            "processed": self.processed,
+            "dropped": self.dropped,
+            "busy_sec": round(self.busy, 3),
+            "queue": size,
+            "queue_max": maxsize,
+            "occupancy": round(size / maxsize, 2) if maxsize else 0.0,
+        }
+
+
+class FramePipeline:
+    def __init__(self, source, stages, maxsize=2, drop_oldest=True, name="default"):
+        """
+        source: anything with read() -> (ok, frame), e.g. cv2.VideoCapture
+        stages: list of (name, fn); each fn takes the previous stage output
+                and returns the next one (None skips the frame)
+        maxsize: bound of every inter-stage queue
+        drop_oldest: when a queue is full, discard its oldest item instead of
+                     blocking the upstream stage (keeps live video current)
+        name: camera label used for the /metrics series
+        """
+        self.name = name
+        self.source = source
+        self.stages = stages
+        self.drop_oldest = drop_oldest
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        self.queues = [queue.Queue(maxsize=maxsize) for _ in range(len(stages) + 1)]
+        self.stats = {"capture": StageStats("capture")}
+        for (name, _), q in zip(stages, self.queues):
+            self.stats[name] = StageStats(name)
+            self.stats[name].queue = q
+        self.stats["output"] = StageStats("output")
+        self.stats["output"].queue = self.queues[-1]
+
+    # ---------------- QUEUES ----------------
+    def _put(self, q, item, stats):
+        while not self.stop_event.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.drop_oldest and item is not _END:
+                    try:
+                        q.get_nowait()
+                        stats.dropped += 1
+                        FRAMES_DROPPED.inc(camera=self.name, stage=stats.name)
+                    except queue.Empty:
+                        pass
+
+    def _get(self, q):
+        while not self.stop_event.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _END
+
+    # ---------------- STAGES ----------------
+    def _capture(self):
+        stats = self.stats["capture"]
+        out_q = self.queues[0]
+        while not self.stop_event.is_set():
+            ret, frame = self.source.read()
+            if not ret:
+                break
+            stats.processed += 1
+            self._put(out_q, frame, self.stats[self.stages[0][0]])
+        self._put(out_q, _END, stats)
+
+    def _run_stage(self, index):
+        name, fn = self.stages[index]
+        stats = self.stats[name]
+        in_q = self.queues[index]
+        out_q = self.queues[index + 1]
+        next_stats = self.stats[self.stages[index + 1][0]] if index + 1 < len(self.stages) else self.stats["output"]
+
+        while not self.stop_event.is_set():
+            item = self._get(in_q)
+            if item is _END:
+                break
+            start = time.perf_counter()
+            result = fn(item)
+            elapsed = time.perf_counter() - start
+            stats.busy += elapsed
+            STAGE_SECONDS.observe(elapsed, camera=self.name, stage=name)
+            stats.processed += 1
+            if result is not None:
+                self._put(out_q, result, next_stats)
+        self._put(out_q, _END, stats)
+
+    def start(self):
+        for stage, s in self.stats.items():
+            if s.queue is not None:
+                QUEUE_DEPTH.set_function(s.queue.qsize, camera=self.name, stage=stage)
+        self.threads = [threading.Thread(target=self._capture, daemon=True)]
+        for i in range(len(self.stages)):
+            self.threads.append(threading.Thread(target=self._run_stage, args=(i,), daemon=True))
+        for t in self.threads:
+            t.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        for t in self.threads:
+            t.join(timeout=1.0)
+        for stage in self.stats:
+            QUEUE_DEPTH.remove(camera=self.name, stage=stage)
+
+    def frames(self):
+        """Yields the output of the last stage until the source ends or stop() is called."""
+        out_q = self.queues[-1]
+        while True:
+            item = self._get(out_q)
+            if item is _END:
+                return
+            self.stats["output"].processed += 1
+            yield item
+
+    def get_stats(self):
+        return {name: s.as_dict() for name, s in self.stats.items()}
@@ -0,0 +1,131 @@
+# roi.py
+# Zone-ROI cropped inference: only the padded zone areas of a frame are
+# tiled into a smaller mosaic and sent to the detector
+import numpy as np
+
+STRIDE = 32 # YOLO input sizes are multiples of the model stride
+GAP = 8 # blank pixels between tiles so boxes cannot span two crops
+
+
+def merge_rects(rects):
+    """Merges overlapping [x1, y1, x2, y2] rectangles until none overlap."""
+    rects = [list(r) for r in rects]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(rects)):
+            for j in range(i + 1, len(rects)):
+                a, b = rects[i], rects[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    rects[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    rects.pop(j)
+                    merged = True
+                    break
+            if merged:
+                break
+    return rects
+
+
+def layout_tiles(rects, max_width):
+    """
+    Shelf-packs the rectangles into rows no wider than max_width.
+    Returns (canvas_w, canvas_h, [(dst_x, dst_y) for each rect]).
+    """
+    order = sorted(range(len(rects)), key=lambda i: rects[i][3] - rects[i][1], reverse=True)
+    places = [None] * len(rects)
+    x = y = shelf_h = canvas_w = 0
+    for i in order:
+        w, h = rects[i][2] - rects[i][0], rects[i][3] - rects[i][1]
+        if x > 0 and x + w > max_width:
+            y += shelf_h + GAP
+            x = shelf_h = 0
+        places[i] = (x, y)
+        x += w + GAP
+        shelf_h = max(shelf_h, h)
+        canvas_w = max(canvas_w, x - GAP)
+    return canvas_w, y + shelf_h, places
+
+
+class ROIDetector:
+    def __init__(self, detect_batch, margin=32, imgsz=640):
+        """
+        detect_batch: fn(frames, imgsz=...) -> per-frame lists of (x1, y1, x2, y2, ...)
+        margin: padding (px) added around every zone's bounding box
+        imgsz: input size the detector uses for a full frame; crops keep the same scale
+        """
+        self.detect_fn = detect_batch
+        self.margin = margin
+        self.imgsz = imgsz
+        self.regions = [] # zone bounding boxes in frame coordinates
+        self.layouts = {} # frame shape -> (rects, places, canvas size)
+
+    def set_regions(self, polygons):
+        """polygons: one (K, 2) point array per zone, e.g. from zone_raster.zone_polygon."""
+        regions = []
+        for p in polygons:
+            p = np.asarray(p).reshape(-1, 2)
+            if len(p):
+                x1, y1 = p.min(axis=0)
+                x2, y2 = p.max(axis=0)
+                regions.append((int(x1), int(y1), int(x2), int(y2)))
+        if regions != self.regions:
+            self.regions = regions
+            self.layouts = {}
+
+    def _layout(self, shape):
+        h, w = shape[:2]
+        layout = self.layouts.get((h, w))
+        if layout is None:
+            m = self.margin
+            rects = [[max(0, x1 - m), max(0, y1 - m), min(w, x2 + m), min(h, y2 + m)]
+                     for x1, y1, x2, y2 in self.regions]
+            rects = [r for r in merge_rects(rects) if r[2] > r[0] and r[3] > r[1]]
+            canvas_w, canvas_h, places = layout_tiles(rects, w)
+            layout = (rects, places, canvas_w, canvas_h)
+            self.layouts[(h, w)] = layout
+        return layout
+
+    def _mosaic(self, frame, layout):
+        rects, places, canvas_w, canvas_h = layout
+        canvas = np.zeros((canvas_h, canvas_w) + frame.shape[2:], dtype=frame.dtype)
+        for (x1, y1, x2, y2), (dx, dy) in zip(rects, places):
+            canvas[dy:dy + y2 - y1, dx:dx + x2 - x1] = frame[y1:y2, x1:x2]
+        return canvas
+
+    def _to_frame(self, layout, boxes):
+        # map mosaic boxes back to frame coordinates via the tile holding their center
+        rects, places, _, _ = layout
+        out = []
+        for b in boxes:
+            cx, cy = (b[0] + b[2]) / 2, (b[1] + b[3]) / 2
+            for (x1, y1, x2, y2), (dx, dy) in zip(rects, places):
+                w, h = x2 - x1, y2 - y1
+                if dx <= cx < dx + w and dy <= cy < dy + h:
+                    bx1 = min(max(b[0], dx), dx + w) - dx + x1
+                    by1 = min(max(b[1], dy), dy + h) - dy + y1
+                    bx2 = min(max(b[2], dx), dx + w) - dx + x1
+                    by2 = min(max(b[3], dy), dy + h) - dy + y1
+                    out.append(type(b)([bx1, by1, bx2, by2]) + type(b)(b[4:]))
+                    break
+        return out
+
+    def detect_batch(self, frames):
+        if not self.regions:
+            return self.detect_fn(frames, imgsz=self.imgsz)
+
+        layouts = [self._layout(f.shape) for f in frames]
+        keep = [i for i, layout in enumerate(layouts) if layout[0]]
+        results = [[] for _ in frames] # zones entirely outside the frame see nobody
+        if not keep:
+            return results
+
+        mosaics = [self._mosaic(frames[i], layouts[i]) for i in keep]
+        # keep the pixel scale of a full-frame pass: a smaller mosaic gets a smaller input
+        scale = max(max(m.shape[:2]) / max(frames[i].shape[:2]) for m, i in zip(mosaics, keep))
+        imgsz = max(STRIDE, int(np.ceil(self.imgsz * scale / STRIDE)) * STRIDE)
+        for i, boxes in zip(keep, self.detect_fn(mosaics, imgsz=imgsz)):
+            results[i] = self._to_frame(layouts[i], boxes)
+        return results
+
+    def detect(self, frame):
+        return self.detect_batch([frame])[0]
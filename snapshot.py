@@ -0,0 +1,38 @@
+# snapshot.py
+# Immutable, versioned snapshots published by the video loop once per frame.
+# Readers just grab the current reference, so they never see half-updated
+# counts, and the JSON body is serialized once per version, not per request.
+import json
+import os
+import time
+from types import MappingProxyType
+
+
+class Snapshot:
+    __slots__ = ("version", "data", "body", "etag", "time")
+
+    def __init__(self, version, data, etag):
+        self.version = version
+        self.data = MappingProxyType(dict(data))
+        self.body = json.dumps(dict(data)).encode()
+        self.etag = etag
+        self.time = time.time()
+
+
+class SnapshotPublisher:
+    def __init__(self, initial=None):
+        # boot id keeps ETags from a previous run from matching this one
+        self.boot = f"{os.getpid():x}{int(time.time()):x}"
+        self.current = Snapshot(0, initial or {}, f"{self.boot}-0")
+
+    def publish(self, data):
+        """Single writer (the video loop). A new version is made only when the data changed."""
+        current = self.current
+        if data == current.data:
+            return current
+        version = current.version + 1
+        self.current = Snapshot(version, data, f"{self.boot}-{version}")
+        return self.current
+
+    def get(self):
+        return self.current
@@ -1,14 +1,15 @@
-import cv2
+from .jpeg_tiers import DEFAULT_TIER, encode_tier
+from .video_feed import VideoFeed
 
-def generate_frames():
-    cap = cv2.VideoCapture('videos/input.mp4') # single video file
+def generate_frames(size=DEFAULT_TIER[0], quality=DEFAULT_TIER[1], fps=None):
+    feed = VideoFeed('videos/input.mp4', target_fps=fps, loop=True) # single video file
 
     while True:
-        success, frame = cap.read()
-        if not success:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, 0) # loop video
+        frame = feed.get_frame()
+        if frame is None:
+            continue
+        frame_bytes = encode_tier(frame, (size, quality))
+        if frame_bytes is None:
             continue
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame_bytes = buffer.tobytes()
         yield (b'--frame\r\n'
                b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
@@ -0,0 +1,24 @@
+# The modules are imported as the vision and models packages (see app.py).
+# In a checkout where they sit flat in the repo root, load that root under
+# both package names so the tests import them the same way.
+import importlib.util
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _alias(package):
+    if package in sys.modules or importlib.util.find_spec(package) is not None:
+        return
+    init = os.path.join(ROOT, "__init__.py")
+    if not os.path.exists(init):
+        return
+    spec = importlib.util.spec_from_file_location(package, init, submodule_search_locations=[ROOT])
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[package] = module
+    spec.loader.exec_module(module)
+
+
+_alias("vision")
+_alias("models")
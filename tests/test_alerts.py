@@ -0,0 +1,74 @@
+import threading
+
+from vision.alerts import AlertEngine
+
+LIMIT = [{"zone": "Entrance", "value": 5}]
+
+
+def states(engine, counts, start=0.0, step=1.0):
+    """The transitions ("on"/"off") raised while stepping through counts."""
+    out = []
+    for i, n in enumerate(counts):
+        out += [e["state"] for e in engine.update("cam", {"Entrance": n}, LIMIT, now=start + i * step)]
+    return out
+
+
+def test_count_at_the_boundary_does_not_flap():
+    engine = AlertEngine(hysteresis=1, min_duration=0)
+    assert states(engine, [5, 4, 5, 4, 5, 4]) == ["on"]
+    assert engine.active("cam") == {"Entrance"}
+
+
+def test_clears_only_below_the_dead_band():
+    engine = AlertEngine(hysteresis=1, min_duration=0)
+    assert states(engine, [5, 4, 3, 4, 5]) == ["on", "off", "on"]
+
+
+def test_min_duration_debounces_both_ways():
+    engine = AlertEngine(hysteresis=1, min_duration=2.0)
+    # on after 2 s over the limit, off after 2 s under the band
+    assert states(engine, [5, 6, 3, 5, 5, 5, 2, 2, 5, 2, 2, 2]) == ["on", "off"]
+
+
+def test_removed_threshold_stops_alerting_silently():
+    engine = AlertEngine(hysteresis=1, min_duration=0)
+    assert states(engine, [6]) == ["on"]
+    assert engine.update("cam", {"Entrance": 6}, [], now=1.0) == []
+    assert engine.active() == set()
+
+
+def test_cameras_are_independent():
+    engine = AlertEngine(hysteresis=1, min_duration=0)
+    engine.update("a", {"Entrance": 9}, LIMIT, now=0.0)
+    engine.update("b", {"Entrance": 1}, LIMIT, now=0.0)
+    assert engine.active("a") == {"Entrance"}
+    assert engine.active("b") == set()
+
+
+def test_concurrent_updates_and_reads():
+    engine = AlertEngine(hysteresis=1, min_duration=0)
+    errors = []
+
+    def camera(name):
+        try:
+            for i in range(2000):
+                # thresholds come and go, so states are added and deleted
+                limits = LIMIT if i % 2 else [{"zone": "Entrance", "value": i % 7}]
+                engine.update(name, {"Entrance": i % 9}, limits, now=float(i))
+        except Exception as e:
+            errors.append(e)
+
+    def reader():
+        try:
+            for _ in range(2000):
+                engine.active()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=camera, args=(f"cam{i}",)) for i in range(4)]
+    threads.append(threading.Thread(target=reader))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
@@ -0,0 +1,74 @@
+import os
+
+import pytest
+
+pytest.importorskip("cv2")
+
+from vision.batch_process import match_tracks, merge_segments, output_stem, video_names
+
+
+def frames(start, count, objects):
+    """The same {id: (cx, cy)} on each of `count` frames from `start`."""
+    return {f: dict(objects) for f in range(start, start + count)}
+
+
+def segment(start, ids, head=None, tail=None, alerts=()):
+    return {"start": start, "ids": set(ids), "head": head or {}, "tail": tail or {},
+            "alerts": list(alerts)}
+
+
+def test_match_tracks_pairs_nearest_tracks():
+    prev_tail = frames(100, 5, {1: (10, 10), 2: (200, 10)})
+    head = frames(100, 5, {7: (205, 12), 8: (12, 9)})
+    assert match_tracks(prev_tail, head) == {7: 2, 8: 1}
+
+
+def test_match_tracks_needs_enough_votes():
+    prev_tail = frames(100, 5, {1: (10, 10)})
+    head = frames(103, 5, {7: (10, 10)}) # only frames 103 and 104 overlap
+    assert match_tracks(prev_tail, head, min_votes=3) == {}
+    assert match_tracks(prev_tail, head, min_votes=2) == {7: 1}
+
+
+def test_match_tracks_ignores_far_tracks():
+    prev_tail = frames(100, 5, {1: (10, 10)})
+    head = frames(100, 5, {7: (100, 10)})
+    assert match_tracks(prev_tail, head, max_distance=50) == {}
+
+
+def test_match_tracks_is_one_to_one():
+    # both new tracks sit closest to old track 1; the one with more votes wins it
+    prev_tail = frames(100, 5, {1: (10, 10)})
+    head = frames(100, 5, {7: (12, 10)})
+    head.update(frames(102, 3, {7: (12, 10), 8: (15, 10)}))
+    assert match_tracks(prev_tail, head) == {7: 1}
+
+
+def test_merge_segments_stitches_ids_across_boundaries():
+    first = segment(0, {1, 2}, tail=frames(95, 5, {1: (10, 10), 2: (200, 10)}),
+                    alerts=[{"frame": 3}])
+    # track 5 continues track 1; track 6 is someone new
+    second = segment(100, {5, 6}, head=frames(95, 5, {5: (11, 10)}),
+                     alerts=[{"frame": 120}])
+
+    segments, mappings, alerts, unique = merge_segments([second, first]) # any order
+    assert [s["start"] for s in segments] == [0, 100]
+    assert mappings == [{1: 1, 2: 2}, {5: 1, 6: 3}]
+    assert alerts == [{"frame": 3}, {"frame": 120}]
+    assert unique == 3
+
+
+def test_merge_segments_chains_global_ids():
+    a = segment(0, {1}, tail=frames(95, 5, {1: (10, 10)}))
+    b = segment(100, {4}, head=frames(95, 5, {4: (10, 10)}), tail=frames(195, 5, {4: (20, 10)}))
+    c = segment(200, {9}, head=frames(195, 5, {9: (21, 10)}))
+    _, mappings, _, unique = merge_segments([a, b, c])
+    assert [m[next(iter(m))] for m in mappings] == [1, 1, 1]
+    assert unique == 1
+
+
+def test_video_names_keep_same_basenames_apart():
+    videos = [os.path.join("videos", "a", "cam1.mp4"), os.path.join("videos", "b", "cam1.mp4")]
+    names = video_names(videos)
+    assert [output_stem(names[v]) for v in videos] == ["a__cam1", "b__cam1"]
+    assert output_stem(video_names(["clip.mp4"])["clip.mp4"]) == "clip"
@@ -0,0 +1,163 @@
+import queue
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from vision.camera_worker import CameraProcess, FrameRing
+
+SHAPE = (4, 6, 3)
+
+
+@pytest.fixture
+def ring():
+    ring = FrameRing(slots=2, max_shape=SHAPE)
+    yield ring
+    ring.close()
+
+
+def frame(value, shape=SHAPE):
+    return np.full(shape, value, dtype=np.uint8)
+
+
+def test_ring_round_trip(ring):
+    ring.write(1, frame(7))
+    out = ring.read(1)
+    assert out.shape == SHAPE
+    assert (out == 7).all()
+
+
+def test_ring_smaller_frame_keeps_its_shape(ring):
+    ring.write(1, frame(3, (2, 3, 3)))
+    assert ring.read(1).shape == (2, 3, 3)
+
+
+def test_ring_overwritten_slot_is_missed(ring):
+    ring.write(1, frame(1))
+    ring.write(3, frame(3)) # same slot of two
+    assert ring.read(1) is None
+    assert (ring.read(3) == 3).all()
+
+
+def test_ring_slot_being_written_is_missed(ring):
+    ring.write(1, frame(1))
+    ring.headers["seq"][1] = -1 # writer is mid-copy
+    assert ring.read(1) is None
+
+
+def test_ring_slot_overwritten_during_read_is_missed(ring):
+    ring.write(1, frame(1))
+    data = ring.data
+
+    class RacingWriter:
+        # the writer reuses the slot while the reader is copying out of it
+        def __getitem__(self, key):
+            ring.headers["seq"][1] = 3
+            return data[key]
+
+    ring.data = RacingWriter()
+    try:
+        assert ring.read(1) is None
+    finally:
+        ring.data = data
+
+
+def test_ring_shared_by_name(ring):
+    reader = FrameRing(slots=2, max_shape=SHAPE, name=ring.name)
+    try:
+        ring.write(2, frame(9))
+        assert (reader.read(2) == 9).all()
+    finally:
+        reader.close()
+
+
+def test_ring_bytes_round_trip(ring):
+    assert ring.write_bytes(1, b"jpeg")
+    assert ring.read_bytes(1) == b"jpeg"
+    ring.write_bytes(3, b"next") # same slot of two
+    assert ring.read_bytes(1) is None
+
+
+def test_ring_rejects_bytes_larger_than_a_slot(ring):
+    assert not ring.write_bytes(1, bytes(ring.slot_bytes + 1))
+    assert ring.read_bytes(1) is None
+
+
+def test_ring_fit_scales_oversized_frames(ring):
+    assert ring.fit(frame(0, (8, 12, 3))).shape == SHAPE
+    assert ring.fit(frame(0, (2, 3, 3))).shape == (2, 3, 3)
+
+
+class FakeProcess:
+    pid = 1
+
+    def __init__(self, exitcode):
+        self.exitcode = exitcode
+
+    def is_alive(self):
+        return False
+
+
+def supervised(exitcodes, messages=()):
+    """A CameraProcess whose workers exit immediately with the given codes, in turn."""
+    worker = CameraProcess("cam", "video.mp4", slots=2, max_shape=SHAPE,
+                           restart_delay=0.01, max_restart_delay=0.02)
+    codes = list(exitcodes)
+
+    def spawn():
+        worker.messages = queue.Queue()
+        for msg in messages:
+            worker.messages.put(msg)
+        worker.process = FakeProcess(codes.pop(0))
+
+    worker._spawn = spawn
+    return worker.start()
+
+
+def test_restart_after_nonzero_exit():
+    worker = supervised([1, 1, 0])
+    try:
+        worker.relay(lambda msg, frame: None)
+        assert worker.restarts == 2
+    finally:
+        worker.close()
+
+
+def test_clean_exit_is_not_restarted():
+    worker = supervised([0])
+    try:
+        worker.relay(lambda msg, frame: None)
+        assert worker.restarts == 0
+    finally:
+        worker.close()
+
+
+def test_relay_delivers_jpegs_and_model_state():
+    model = {"ready": True}
+    full, half = ("full", "high"), ("half", "low")
+    worker = supervised([0], [
+        {"seq": 1, "jpegs": [(full, 3)], "model": model},
+        {"seq": 2, "jpegs": [(full, 3), (half, 2)], "model": model},
+        {"seq": 4, "jpegs": [], "model": model}, # nobody watching: nothing encoded
+    ])
+    results = []
+    try:
+        worker.ring.write_bytes(1, b"one")
+        worker.ring.write_bytes(3, b"xyz") # reuses seq 1's slot before it is relayed
+        worker.ring.write_bytes(2, b"abcde")
+        worker.relay(lambda msg, jpegs: results.append((msg["seq"], jpegs)))
+        assert results == [(1, None), (2, {full: b"abc", half: b"de"}), (4, None)]
+        assert worker.missed_frames == 1
+        assert worker.get_stats()["model"] == model
+    finally:
+        worker.close()
+
+
+def test_send_remembers_tiers_for_restarts():
+    worker = supervised([0])
+    try:
+        worker.send("tiers", [("half", "low")])
+        assert worker.tiers == [("half", "low")]
+    finally:
+        worker.close()
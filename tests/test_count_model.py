@@ -0,0 +1,78 @@
+from datetime import datetime
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from vision.count_model import ObservationLog
+
+ZONES = ["Entrance", "Till"]
+START = 1_700_000_000.0
+
+
+def test_rows_stay_aligned_with_their_zones():
+    log = ObservationLog(capacity=100)
+    # track 1 in both zones, 2 only at the till, 3 outside every zone
+    log.record("cam", [1, 2, 3], [[True, True], [False, True], [False, False]], ZONES, ts=START)
+    records = sorted((c.id, c.zone) for c in log)
+    assert records == [(1, "Entrance"), (1, "Till"), (2, "Till"), (3, "N/A")]
+    assert all(c.time == datetime.fromtimestamp(START) for c in log)
+
+
+def test_len_counts_people_not_rows():
+    log = ObservationLog(capacity=100)
+    log.record("a", [1, 2], [[True, True], [False, False]], ZONES, ts=START)
+    log.record("b", [7], [[True, False]], ZONES, ts=START)
+    assert len(log) == 3
+
+
+def test_latest_frame_replaces_the_previous_one():
+    log = ObservationLog(capacity=100)
+    log.record("cam", [1, 2], [[True, False], [True, False]], ZONES, ts=START)
+    log.record("cam", [1], [[False, True]], ZONES, ts=START + 1)
+    assert [(c.id, c.zone) for c in log] == [(1, "Till")]
+
+
+def test_occupancy_per_camera_and_overall():
+    log = ObservationLog(capacity=100)
+    log.record("a", [1, 2], [[True, True], [False, True]], ZONES, ts=START)
+    log.record("b", [5, 6], [[True, False], [False, False]], ZONES, ts=START)
+    assert log.occupancy("a") == {"Entrance": 1, "Till": 2}
+    assert log.occupancy("b") == {"Entrance": 1, "Till": 0}
+    assert log.occupancy() == {"Entrance": 2, "Till": 2}
+
+
+def test_ring_keeps_the_newest_rows_in_order():
+    log = ObservationLog(capacity=5)
+    for frame in range(4):
+        log.record("cam", [frame, frame + 10], [[True, False], [False, True]], ZONES, ts=START + frame)
+    rows = log.view()
+    assert len(rows) == 5
+    assert rows["time"].tolist() == [START + 1] + [START + 2] * 2 + [START + 3] * 2
+    assert rows["track"].tolist() == [11, 2, 12, 3, 13]
+
+
+def test_clear():
+    log = ObservationLog(capacity=10)
+    log.record("cam", [1], [[True, False]], ZONES, ts=START)
+    log.clear()
+    assert len(log.view()) == 0 and len(log) == 0
+
+
+def test_hourly_aggregates():
+    log = ObservationLog(capacity=100)
+    # hour 0: three frames at the entrance with 1, 2, then 3 people (4 distinct tracks)
+    log.record("cam", [1], [[True, False]], ZONES, ts=START)
+    log.record("cam", [1, 2], [[True, False], [True, False]], ZONES, ts=START + 1)
+    log.record("cam", [3, 4, 5], [[True, False], [True, False], [False, False]], ZONES, ts=START + 2)
+    # hour 1: one person at the till
+    log.record("cam", [9], [[False, True]], ZONES, ts=START + 3600)
+    # outside the window
+    log.record("cam", [8], [[True, False]], ZONES, ts=START + 7200)
+
+    rows = log.hourly(START, START + 7200)
+    assert [(r["hour"], r["zone"], r["unique"], r["peak"], r["average"]) for r in rows] == [
+        (datetime.fromtimestamp(START), "Entrance", 4, 2, 1.67),
+        (datetime.fromtimestamp(START + 3600), "Till", 1, 1, 1.0),
+    ]
+    assert log.hourly(START + 9000, START + 9999) == []
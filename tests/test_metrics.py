@@ -0,0 +1,33 @@
+import pytest
+
+from vision.metrics import REGISTRY, Counter, Histogram
+
+
+@pytest.fixture
+def metric():
+    created = []
+
+    def make(cls, *args, **kwargs):
+        m = cls(*args, **kwargs)
+        created.append(m)
+        return m
+
+    yield make
+    for m in created:
+        REGISTRY.remove(m)
+
+
+def test_label_values_are_escaped(metric):
+    frames = metric(Counter, "test_frames_total", "Frames", ["camera"])
+    frames.inc(camera='Lobby "A"\\2\nfoo 1')
+    lines = frames.render().split("\n")
+    # still one sample line, with the value escaped as the exposition format requires
+    assert lines[2:] == ['test_frames_total{camera="Lobby \\"A\\"\\\\2\\nfoo 1"} 1']
+
+
+def test_histogram_buckets_keep_escaped_labels(metric):
+    seconds = metric(Histogram, "test_seconds", "Seconds", ["camera"], buckets=(1,))
+    seconds.observe(0.5, camera='a"b')
+    body = seconds.render()
+    assert 'test_seconds_bucket{camera="a\\"b",le="1"} 1' in body
+    assert 'test_seconds_count{camera="a\\"b"} 1' in body
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from vision.model_pool import ModelPool
+
+
+class FakeModel:
+    """Records each forward pass; the first one blocks until `gate` is set."""
+
+    def __init__(self):
+        self.calls = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+
+    def predict(self, frames, imgsz=640, conf=0.25, classes=None):
+        self.calls.append((list(frames), imgsz, conf, classes))
+        self.entered.set()
+        self.gate.wait(5)
+        return [(f, imgsz, conf) for f in frames]
+
+
+class FakePool(ModelPool):
+    def __init__(self, model, **options):
+        self.model = model
+        super().__init__(workers=1, threads=1, warmup=False, **options)
+
+    def _load(self):
+        if isinstance(self.model, Exception):
+            raise self.model
+        return self.model
+
+
+def test_coalesces_only_matching_params():
+    model = FakeModel()
+    pool = FakePool(model)
+    try:
+        first = pool.submit(["a"])
+        assert model.entered.wait(5) # the worker is busy, so the rest queue up
+        b = pool.submit(["b"], conf=0.4)
+        c = pool.submit(["c1", "c2"], conf=0.4)
+        d = pool.submit(["d"], conf=0.5)
+        e = pool.submit(["e"], conf=0.4)
+        model.gate.set()
+
+        assert first.result(5) == [("a", 640, 0.25)]
+        assert b.result(5) == [("b", 640, 0.4)]
+        assert c.result(5) == [("c1", 640, 0.4), ("c2", 640, 0.4)]
+        assert d.result(5) == [("d", 640, 0.5)]
+        assert e.result(5) == [("e", 640, 0.4)]
+        # b and c share a pass; d's settings differ, so it and everything after it wait
+        assert [(frames, conf) for frames, _, conf, _ in model.calls] == [
+            (["a"], 0.25), (["b", "c1", "c2"], 0.4), (["d"], 0.5), (["e"], 0.4)]
+        assert pool.get_stats()["batches"] == 4
+    finally:
+        pool.close()
+
+
+def test_max_batch_splits_passes():
+    model = FakeModel()
+    pool = FakePool(model, max_batch=2)
+    try:
+        pool.submit(["a"])
+        assert model.entered.wait(5)
+        futures = [pool.submit([f]) for f in "bcd"]
+        model.gate.set()
+        assert [f.result(5) for f in futures] == [[(f, 640, 0.25)] for f in "bcd"]
+        assert [frames for frames, *_ in model.calls] == [["a"], ["b", "c"], ["d"]]
+    finally:
+        pool.close()
+
+
+def test_ready_once_loaded():
+    model = FakeModel()
+    model.gate.set()
+    pool = FakePool(model)
+    try:
+        assert pool.ready.wait(5)
+        assert pool.get_stats()["ready"]
+    finally:
+        pool.close()
+
+
+def test_failed_load_is_not_ready():
+    pool = FakePool(RuntimeError("no weights"))
+    try:
+        assert pool.ready.wait(5)
+        stats = pool.get_stats()
+        assert not stats["ready"] and "no weights" in stats["error"]
+        with pytest.raises(RuntimeError, match="failed to load"):
+            pool.predict(["a"], timeout=5)
+    finally:
+        pool.close()
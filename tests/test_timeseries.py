@@ -0,0 +1,70 @@
+import pytest
+
+from vision.timeseries import TIERS, TimeSeriesStore
+
+START = 1_700_000_040.0 # on a minute boundary
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TimeSeriesStore(str(tmp_path / "history.db"))
+
+
+def test_record_buffers_until_flush(store):
+    store.record({"total": 1}, ts=START)
+    assert len(store) == 1
+    assert store.query(START, START + 1, tier="raw") == []
+    assert store.flush() == 1
+    assert len(store) == 0
+    assert store.query(START, START + 1, tier="raw") == [{"ts": START, "total": 1.0}]
+
+
+def test_rollups_average_each_bucket(store):
+    for i, v in enumerate([2, 4, 6, 8]):
+        store.record({"total": v, "Entrance": 1}, ts=START + i * 0.5)
+    store.flush()
+    store.record({"total": 10}, ts=START + 61)
+    store.flush() # a later batch lands in a new bucket
+
+    assert store.query(START, START + 120, tier="1s") == [
+        {"ts": START, "total": 3.0, "Entrance": 1.0},
+        {"ts": START + 1, "total": 7.0, "Entrance": 1.0},
+        {"ts": START + 61, "total": 10.0},
+    ]
+    assert store.query(START, START + 120, tier="1m") == [
+        {"ts": START, "total": 5.0, "Entrance": 1.0},
+        {"ts": START + 60, "total": 10.0},
+    ]
+
+
+def test_batches_merge_into_the_same_bucket(store):
+    store.record({"total": 1}, ts=START)
+    store.flush()
+    store.record({"total": 5}, ts=START + 30)
+    store.flush()
+    assert store.query(START, START + 59, tier="1m") == [{"ts": START, "total": 3.0}]
+
+
+def test_unknown_tier(store):
+    with pytest.raises(ValueError, match="unknown tier"):
+        store.query(START, START + 1, tier="5m")
+
+
+def test_prune_drops_expired_rows_per_tier(store):
+    store.record({"total": 1}, ts=START)
+    store.flush()
+    store.prune(now=START + TIERS["raw"][1] + 1)
+    assert store.query(START, START + 1, tier="raw") == []
+    assert store.query(START, START + 1, tier="1s") == [{"ts": START, "total": 1.0}]
+    store.prune(now=START + TIERS["1s"][1] + 1)
+    assert store.query(START, START + 1, tier="1s") == []
+    assert store.query(START, START + 1, tier="1h") != []
+
+
+def test_pick_tier(store):
+    now = START + 10
+    assert store.pick_tier(START, now, max_points=5000, now=now) == "1s"
+    assert store.pick_tier(START - 86400, now, max_points=5000, now=now) == "1m"
+    # older than the 1s tier keeps
+    assert store.pick_tier(now - 3 * 86400, now - 3 * 86400 + 10, now=now) == "1m"
+    assert store.pick_tier(now - 365 * 86400, now, now=now) == "1h"
@@ -0,0 +1,60 @@
+import pytest
+
+pytest.importorskip("numpy")
+
+from vision.tracker import SimpleTracker
+
+
+def box(x, y=50, r=5):
+    return (x - r, y - r, x + r, y + r)
+
+
+def test_new_detections_get_new_ids_and_keep_them():
+    tracker = SimpleTracker()
+    assert tracker.update([box(10), box(100)]) == {1: (10, 50), 2: (100, 50)}
+    assert tracker.update([box(102), box(12)]) == {1: (12, 50), 2: (102, 50)}
+    assert tracker.boxes == {1: box(12), 2: box(102)}
+
+
+def test_each_detection_matches_at_most_one_track():
+    tracker = SimpleTracker(max_distance=50)
+    tracker.update([box(0), box(30)])
+    # both tracks are within reach of the one detection; the closest takes it
+    objects = tracker.update([box(25)])
+    assert objects == {2: (25, 50)}
+
+
+def test_nearest_pairs_win_regardless_of_detection_order():
+    tracker = SimpleTracker(max_distance=50)
+    tracker.update([box(0), box(40)])
+    assert tracker.update([box(45), box(5)]) == {1: (5, 50), 2: (45, 50)}
+
+
+def test_detection_out_of_reach_starts_a_new_track():
+    tracker = SimpleTracker(max_distance=20)
+    tracker.update([box(0)])
+    assert tracker.update([box(50)]) == {2: (50, 50)}
+
+
+def test_missed_track_coasts_on_its_velocity():
+    tracker = SimpleTracker(max_distance=15, max_missed=5)
+    for x in (0, 10, 20, 30):
+        tracker.update([box(x)])
+    assert tracker.update([]) == {} # missed this frame, but still tracked
+    # 20 px from where it was last seen, but next to where it was heading
+    assert tracker.update([box(50)]) == {1: (50, 50)}
+
+
+def test_track_dropped_after_max_missed():
+    tracker = SimpleTracker(max_missed=2)
+    tracker.update([box(10)])
+    for _ in range(3):
+        tracker.update([])
+    assert len(tracker.ids) == 0
+    assert tracker.update([box(10)]) == {2: (10, 50)}
+
+
+def test_empty_frames():
+    tracker = SimpleTracker()
+    assert tracker.update([]) == {}
+    assert tracker.boxes == {}
@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("cv2")
+
+from vision.zone_raster import ZoneRaster, bits_to_membership, zone_polygon
+
+SHAPE = (100, 200, 3)
+LEFT = {"name": "Left", "coords": [(0, 0), (119, 99)]}
+RIGHT = {"name": "Right", "coords": [(80, 0), (199, 99)]} # overlaps Left on x 80..119
+
+
+@pytest.fixture
+def raster():
+    raster = ZoneRaster(SHAPE)
+    raster.compile([LEFT, RIGHT])
+    return raster
+
+
+def test_overlapping_zones_both_contain_a_point(raster):
+    inside = raster.membership([(10, 50), (100, 50), (150, 50)])
+    assert raster.names == ["Left", "Right"]
+    assert inside.tolist() == [[True, False], [True, True], [False, True]]
+    assert raster.counts([(10, 50), (100, 50), (150, 50)]).tolist() == [2, 2]
+
+
+def test_points_outside_the_frame_are_in_no_zone(raster):
+    assert raster.lookup([(-1, 10), (10, -1), (200, 10), (10, 100)]).tolist() == [0, 0, 0, 0]
+
+
+def test_empty_point_list(raster):
+    assert raster.membership([]).shape == (0, 2)
+    assert raster.counts([]).tolist() == [0, 0]
+
+
+def test_polygon_zone():
+    raster = ZoneRaster(SHAPE)
+    raster.compile([{"name": "Tri", "coords": [(0, 0), (100, 0), (0, 99)]}])
+    assert raster.membership([(10, 10), (90, 90)]).tolist() == [[True], [False]]
+
+
+def test_invalid_zones_are_skipped_and_names_stay_aligned():
+    raster = ZoneRaster(SHAPE)
+    raster.compile([[5, 5, 50, 50], [], [100, 5, 150, 50]], names=["A", "broken", "C"])
+    assert raster.names == ["A", "C"]
+    assert raster.membership([(120, 20)]).tolist() == [[False, True]]
+
+
+def test_recompiles_only_when_zones_change(raster):
+    assert not raster.compile([LEFT, RIGHT])
+    assert raster.compile([RIGHT])
+    assert raster.names == ["Right"]
+
+
+def test_more_than_eight_zones_widen_the_mask():
+    raster = ZoneRaster(SHAPE)
+    zones = [[i * 20, 0, i * 20 + 19, 99] for i in range(10)]
+    raster.compile(zones)
+    assert raster.labels.dtype == np.uint16
+    inside = raster.membership([(185, 50)])
+    assert inside[0].tolist() == [False] * 9 + [True]
+
+
+def test_zone_formats_convert_to_the_same_rectangle():
+    expected = [[1, 2], [3, 2], [3, 4], [1, 4]]
+    assert zone_polygon([1, 2, 3, 4]).tolist() == expected
+    assert zone_polygon([(3, 4), (1, 2)]).tolist() == expected
+    assert zone_polygon({"coords": [(1, 2), (3, 4)]}).tolist() == expected
+    assert zone_polygon([]) is None
+
+
+def test_bits_to_membership():
+    assert bits_to_membership(np.array([0b101, 0]), 3).tolist() == [[True, False, True], [False, False, False]]
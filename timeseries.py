@@ -0,0 +1,163 @@
+# timeseries.py
+# Bounded, persistent store for occupancy history: samples go into an
+# in-memory ring buffer and are flushed in batches to SQLite (WAL mode),
+# rolled up into 1-second, 1-minute and 1-hour buckets as they are written
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# tier name -> (bucket size in seconds, how long the tier is kept; None = forever)
+TIERS = {
+    "raw": (0, 6 * 3600),
+    "1s": (1, 2 * 86400),
+    "1m": (60, 90 * 86400),
+    "1h": (3600, None),
+}
+
+
+class TimeSeriesStore:
+    def __init__(self, path="data/history.db", ring_size=50000, flush_interval=1.0, tiers=TIERS):
+        self.path = path
+        self.tiers = tiers
+        self.ring = deque(maxlen=ring_size) # (ts, {series: value}) waiting to be flushed
+        self.dropped = 0
+        self.flush_interval = flush_interval
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_prune = 0.0
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("CREATE TABLE IF NOT EXISTS raw ("
+                       "ts REAL NOT NULL, series TEXT NOT NULL, value REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS raw_ts ON raw (ts)")
+            for tier in tiers:
+                if tier == "raw":
+                    continue
+                db.execute(f"CREATE TABLE IF NOT EXISTS rollup_{tier} ("
+                           "bucket INTEGER NOT NULL, series TEXT NOT NULL, "
+                           "n INTEGER NOT NULL, sum REAL NOT NULL, min REAL NOT NULL, max REAL NOT NULL, "
+                           "PRIMARY KEY (bucket, series)) WITHOUT ROWID")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=10)
+        try:
+            db.execute("PRAGMA synchronous=NORMAL")
+            with db: # commits on success
+                yield db
+        finally:
+            db.close()
+
+    def __len__(self):
+        return len(self.ring)
+
+    # ---------------- WRITE ----------------
+    def record(self, values, ts=None):
+        """Called from the video loop once per frame; never touches the disk."""
+        if len(self.ring) == self.ring.maxlen:
+            self.dropped += 1
+        self.ring.append((ts if ts is not None else time.time(), dict(values)))
+
+    def flush(self):
+        batch = []
+        while self.ring:
+            try:
+                batch.append(self.ring.popleft())
+            except IndexError:
+                break
+        if not batch:
+            return 0
+
+        raw = [(ts, k, float(v)) for ts, values in batch for k, v in values.items()]
+        with self._connect() as db:
+            db.executemany("INSERT INTO raw (ts, series, value) VALUES (?, ?, ?)", raw)
+            for tier, (size, _) in self.tiers.items():
+                if tier == "raw":
+                    continue
+                # aggregate the batch per bucket first, then merge into the table
+                agg = {}
+                for ts, k, v in raw:
+                    key = (int(ts // size) * size, k)
+                    a = agg.get(key)
+                    if a is None:
+                        agg[key] = [1, v, v, v]
+                    else:
+                        a[0] += 1
+                        a[1] += v
+                        a[2] = min(a[2], v)
+                        a[3] = max(a[3], v)
+                db.executemany(
+                    f"INSERT INTO rollup_{tier} (bucket, series, n, sum, min, max) VALUES (?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (bucket, series) DO UPDATE SET n = n + excluded.n, sum = sum + excluded.sum, "
+                    "min = MIN(min, excluded.min), max = MAX(max, excluded.max)",
+                    [(b, k, n, s, lo, hi) for (b, k), (n, s, lo, hi) in agg.items()])
+        return len(batch)
+
+    def prune(self, now=None):
+        now = now or time.time()
+        with self._connect() as db:
+            for tier, (_, keep) in self.tiers.items():
+                if keep is None:
+                    continue
+                if tier == "raw":
+                    db.execute("DELETE FROM raw WHERE ts < ?", (now - keep,))
+                else:
+                    db.execute(f"DELETE FROM rollup_{tier} WHERE bucket < ?", (int(now - keep),))
+        self.last_prune = now
+
+    def _run(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+            if time.time() - self.last_prune > 60:
+                self.prune()
+        self.flush()
+
+    def start(self):
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+
+    # ---------------- READ ----------------
+    def pick_tier(self, start, end, max_points=5000, now=None):
+        """Finest tier that still holds data from `start` and returns at most max_points buckets."""
+        now = now or time.time()
+        for tier, (size, keep) in self.tiers.items():
+            if keep is not None and start < now - keep:
+                continue
+            if tier != "raw" and (end - start) / size <= max_points:
+                return tier
+        return list(self.tiers)[-1]
+
+    def query(self, start, end=None, tier=None, max_points=5000):
+        """
+        Returns [{"ts": bucket_start, series: mean_value, ...}, ...] ordered by time.
+        tier: "raw", "1s", "1m" or "1h"; picked automatically when omitted.
+        """
+        end = end if end is not None else time.time()
+        tier = tier or self.pick_tier(start, end, max_points)
+        if tier != "raw" and tier not in self.tiers:
+            raise ValueError(f"unknown tier {tier!r}; expected one of {', '.join(dict.fromkeys(['raw', *self.tiers]))}")
+        with self._connect() as db:
+            if tier == "raw":
+                rows = db.execute("SELECT ts, series, value FROM raw WHERE ts >= ? AND ts <= ? ORDER BY ts",
+                                  (start, end)).fetchall()
+            else:
+                size = self.tiers[tier][0]
+                rows = db.execute(f"SELECT bucket, series, sum / n FROM rollup_{tier} "
+                                  "WHERE bucket >= ? AND bucket <= ? ORDER BY bucket",
+                                  (int(start // size) * size, end)).fetchall()
+        out = {}
+        for ts, series, value in rows:
+            out.setdefault(ts, {"ts": ts})[series] = value
+        return list(out.values())
@@ -1,27 +1,86 @@
-import math
+import time
+
+import numpy as np
+
+from .metrics import TRACKER_SECONDS
 
 class SimpleTracker:
-    def __init__(self):
+    def __init__(self, max_distance=50, max_missed=5):
+        self.max_distance = max_distance
+        self.max_missed = max_missed # frames a track may coast without a detection
         self.objects = {}
+        self.boxes = {} # id -> (x1, y1, x2, y2) of the tracks returned by update()
         self.next_id = 1
 
+        # one row per live track
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.pos = np.zeros((0, 2), dtype=np.float32)
+        self.box = np.zeros((0, 4), dtype=np.int32)
+        self.vel = np.zeros((0, 2), dtype=np.float32)
+        self.missed = np.zeros(0, dtype=np.int32)
+
+    def _assign(self, pred, centroids):
+        # greedy global assignment: closest pair first, every track/detection used once
+        if len(pred) == 0 or len(centroids) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        d = np.linalg.norm(pred[:, None, :] - centroids[None, :, :], axis=2)
+        rows, cols = np.nonzero(d < self.max_distance)
+        order = np.argsort(d[rows, cols], kind="stable")
+        rows, cols = rows[order], cols[order]
+
+        used_t = np.zeros(len(pred), dtype=bool)
+        used_d = np.zeros(len(centroids), dtype=bool)
+        keep = np.zeros(len(rows), dtype=bool)
+        for k, (r, c) in enumerate(zip(rows.tolist(), cols.tolist())):
+            if not used_t[r] and not used_d[c]:
+                used_t[r] = used_d[c] = True
+                keep[k] = True
+        return rows[keep], cols[keep]
+
     def update(self, detections):
-        new_objects = {}
+        start = time.perf_counter()
+        if len(detections) == 0:
+            boxes = np.zeros((0, 4), dtype=np.float32)
+        else:
+            boxes = np.asarray([d[:4] for d in detections], dtype=np.float32)
+        centroids = ((boxes[:, :2] + boxes[:, 2:4]) / 2).astype(np.int32).astype(np.float32)
+
+        # coast every track forward by its velocity before matching
+        pred = self.pos + self.vel
+        t_idx, d_idx = self._assign(pred, centroids)
 
-        for box in detections:
-            x1,y1,x2,y2 = box
-            cx, cy = int((x1+x2)/2), int((y1+y2)/2)
+        self.vel[t_idx] = 0.5 * self.vel[t_idx] + 0.5 * (centroids[d_idx] - self.pos[t_idx])
+        self.pos = pred
+        self.pos[t_idx] = centroids[d_idx]
+        self.box[t_idx] = boxes[d_idx]
+        self.missed += 1
+        self.missed[t_idx] = 0
 
-            matched = False
-            for obj_id, (px,py) in self.objects.items():
-                if math.dist((cx,cy),(px,py)) < 50:
-                    new_objects[obj_id] = (cx,cy)
-                    matched = True
-                    break
+        # new tracks for unmatched detections
+        new = np.ones(len(centroids), dtype=bool)
+        new[d_idx] = False
+        n_new = int(new.sum())
+        self.ids = np.concatenate([self.ids, np.arange(self.next_id, self.next_id + n_new)])
+        self.next_id += n_new
+        self.pos = np.concatenate([self.pos, centroids[new]])
+        self.box = np.concatenate([self.box, boxes[new].astype(np.int32)])
+        self.vel = np.concatenate([self.vel, np.zeros((n_new, 2), dtype=np.float32)])
+        self.missed = np.concatenate([self.missed, np.zeros(n_new, dtype=np.int32)])
 
-            if not matched:
-                new_objects[self.next_id] = (cx,cy)
-                self.next_id += 1
+        # age out tracks that have been missing for too long
+        alive = self.missed <= self.max_missed
+        self.ids, self.pos, self.vel = self.ids[alive], self.pos[alive], self.vel[alive]
+        self.box = self.box[alive]
+        self.missed = self.missed[alive]
 
-        self.objects = new_objects
+        seen = self.missed == 0
+        self.objects = {
+            int(i): (int(x), int(y))
+            for i, (x, y) in zip(self.ids[seen], self.pos[seen])
+        }
+        self.boxes = {
+            int(i): tuple(int(v) for v in b)
+            for i, b in zip(self.ids[seen], self.box[seen])
+        }
+        TRACKER_SECONDS.observe(time.perf_counter() - start, tracker="simple")
         return self.objects
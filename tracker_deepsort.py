@@ -2,6 +2,9 @@
 # Wrapper for deep-sort-realtime
 from deep_sort_realtime.deepsort_tracker import DeepSort
 import numpy as np
+import time
+
+from .metrics import TRACKER_SECONDS
 
 class DeepSortTracker:
     def __init__(self, max_age=30, n_init=3):
@@ -15,6 +18,7 @@ class DeepSortTracker:
         Returns a list of tracks where each track is a dict:
             { 'track_id': int, 'bbox': [x1,y1,x2,y2], 'det_conf': float, 'class_id': int }
         """
+        start = time.perf_counter()
         # deep_sort_realtime expects detection dictionaries or list entries.
         # We'll convert to format: (xyxy, confidence, class_name)
         dets_for_ds = []
@@ -36,4 +40,5 @@ class DeepSortTracker:
                 "bbox": [int(ltrb[0]), int(ltrb[1]), int(ltrb[2]), int(ltrb[3])],
                 "det_conf": conf
             })
+        TRACKER_SECONDS.observe(time.perf_counter() - start, tracker="deepsort")
         return out_tracks
\ No newline at end of file
@@ -1,17 +1,189 @@
+import threading
+import time
+
 import cv2
 
 class VideoFeed:
-    def __init__(self, source=0):
+    def __init__(self, source=0, target_fps=None, size=None, loop=False, latest=False, realtime=False):
+        """
+        target_fps: analysis rate; frames in between are skipped with grab(),
+                    only the kept ones are decoded with retrieve()
+        size: (w, h) frames are returned at; asked of the capture backend
+              first (cameras), resized after decode otherwise
+        loop: rewind file sources when they end
+        latest: read in a background thread that keeps only the newest frame,
+                so a slow consumer never sees a growing backlog (live sources)
+        realtime: pace a file source at its own frame rate, like a live camera
+        """
+        self.source = source
         self.cap = cv2.VideoCapture(source)
         if not self.cap.isOpened():
             raise Exception("❌ Cannot open camera/video source")
+        self.loop = loop
+        self.size = size
+        self.source_fps = self.cap.get(cv2.CAP_PROP_FPS) or None
+        self.target_fps = target_fps
+        # keep every step-th frame; fractional steps keep the average rate exact
+        if target_fps and self.source_fps and target_fps < self.source_fps:
+            self.step = self.source_fps / target_fps
+        else:
+            self.step = 1.0
+        self.next_keep = 0.0
+        self.index = -1 # source frame index of the last grab
+        self.grabbed = 0
+        self.decoded = 0
+        self.position = 0.0 # seconds into the source of the last returned frame
+        self.read_position = 0.0
+        self.started = None
+        self.realtime = realtime
+
+        # latest-frame mode
+        self.use_latest = latest
+        self.cond = threading.Condition()
+        self.latest = None # (seq, frame, capture time, position)
+        self.seq = 0 # frames captured
+        self.returned = 0 # last seq handed to the consumer
+        self.dropped = 0 # captured but replaced before anyone read them
+        self.age = 0.0 # seconds between capture and get_frame of the last frame
+        self.captured = None # perf_counter() when the last returned frame was read
+        self.ended = False
+        self.thread = None
+
+        self.scaled_at_decode = False
+        if size:
+            w, h = size
+            self.scaled_at_decode = (self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, w)
+                                     and self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, h)
+                                     and int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)) == w
+                                     and int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)) == h)
+
+    def _grab(self):
+        if self.realtime and self.source_fps:
+            # wait until this frame would have arrived from a live camera
+            delay = self.started + self.grabbed / self.source_fps - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        if self.cap.grab():
+            return True
+        if not self.loop:
+            return False
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self.index = -1
+        self.next_keep = 0.0
+        return self.cap.grab()
 
-    def get_frame(self):
-        ret, frame = self.cap.read()
+    def get_frame(self, timeout=None):
+        if self.started is None:
+            self.started = time.perf_counter()
+            if self.use_latest:
+                self.thread = threading.Thread(target=self._grab_loop, daemon=True)
+                self.thread.start()
+        if self.thread is not None:
+            return self._get_latest(timeout)
+        frame = self._read()
+        self.position = self.read_position
+        self.captured = time.perf_counter()
+        return frame
+
+    def _read(self):
+        while True:
+            if not self._grab():
+                return None
+            self.index += 1
+            self.grabbed += 1
+            if self.index >= self.next_keep:
+                break
+        self.next_keep += self.step
+
+        ret, frame = self.cap.retrieve()
         if not ret:
             return None
+        self.decoded += 1
+        self.read_position = self.index / self.source_fps if self.source_fps else time.perf_counter() - self.started
+        if self.size and not self.scaled_at_decode and (frame.shape[1], frame.shape[0]) != tuple(self.size):
+            frame = cv2.resize(frame, tuple(self.size), interpolation=cv2.INTER_AREA)
+        return frame
+
+    # ---------------- LATEST-FRAME MODE ----------------
+    def _grab_loop(self):
+        while not self.ended:
+            frame = self._read()
+            now = time.perf_counter()
+            with self.cond:
+                if frame is None:
+                    self.ended = True
+                else:
+                    if self.latest is not None and self.latest[0] > self.returned:
+                        self.dropped += 1
+                    self.seq += 1
+                    self.latest = (self.seq, frame, now, self.read_position)
+                self.cond.notify_all()
+
+    def _get_latest(self, timeout=None):
+        """Newest frame not returned yet; waits for one, None once the source ended."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.ended or (self.latest and self.latest[0] > self.returned), timeout)
+            if self.latest is None or self.latest[0] <= self.returned:
+                return None
+            seq, frame, captured, position = self.latest
+            self.returned = seq
+        self.age = time.perf_counter() - captured
+        self.captured = captured
+        self.position = position
         return frame
 
+    def stats(self):
+        elapsed = time.perf_counter() - self.started if self.started else 0.0
+        return {
+            "source_fps": self.source_fps,
+            "target_fps": self.target_fps,
+            # frames analyzed per second of source video
+            "effective_fps": round(self.source_fps / self.step, 2) if self.source_fps else None,
+            # frames analyzed per second of wall time
+            "processed_fps": round(self.decoded / elapsed, 2) if elapsed > 0 else 0.0,
+            "grabbed": self.grabbed,
+            "decoded": self.decoded,
+            "scaled_at_decode": self.scaled_at_decode,
+            "dropped": self.dropped,
+            "frame_age_ms": round(self.age * 1000, 1),
+        }
+
     def release(self):
+        # capture only: windows belong to whoever opened them (and headless builds have none)
+        if self.thread is not None:
+            with self.cond:
+                self.ended = True
+            self.thread.join(timeout=2)
         self.cap.release()
-        cv2.destroyAllWindows()
\ No newline at end of file
+
+
+if __name__ == "__main__":
+    # latency check: a file paced like a live camera, read by a deliberately slow consumer
+    #   python video_feed.py "videos/Entrance area.mp4" --work 0.2
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Capture-to-result latency of the latest-frame reader")
+    parser.add_argument("source")
+    parser.add_argument("--work", type=float, default=0.2, help="seconds of simulated processing per frame")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--sync", action="store_true", help="read synchronously instead, for comparison")
+    args = parser.parse_args()
+
+    feed = VideoFeed(args.source, latest=not args.sync, realtime=True)
+    # latency = how long after a live camera would have delivered the frame its result is ready
+    latencies = []
+    end = time.perf_counter() + args.seconds
+    while time.perf_counter() < end:
+        frame = feed.get_frame(timeout=1.0)
+        if frame is None:
+            break
+        time.sleep(args.work) # stand-in for inference
+        latencies.append(time.perf_counter() - feed.started - feed.position)
+    feed.release()
+    if not latencies:
+        raise SystemExit(f"No frames read from {args.source}")
+
+    latencies.sort()
+    ms = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+    print(f"{len(latencies)} frames, latency p50 {ms(0.5)} ms, p95 {ms(0.95)} ms, max {ms(1.0)} ms")
+    print(feed.stats())
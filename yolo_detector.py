@@ -1,14 +1,18 @@
 # yolo_detector.py
 # Simple wrapper for YOLOv8 detection (person class only)
-from ultralytics import YOLO
 import numpy as np
 
+from .model_pool import get_pool
+from .metrics import INFERENCE_SECONDS, INFERENCE_BATCH
+
 class YOLODetector:
-    def __init__(self, model_path="yolov8n.pt", device="cpu"):
-        # device can be "cpu" or "cuda"
-        self.model = YOLO(model_path)
-        self.model.fuse() # optional speedup
+    def __init__(self, model_path="yolov8n.pt", device="cpu", backend="torch", calib_sources=None):
+        # device can be "cpu" or "cuda" (torch backend only)
+        # backend: "torch", "onnx", "onnx-int8" or "openvino" (see backends.py)
+        # the model itself lives in the shared pool (see model_pool.py)
+        self.pool = get_pool(model_path, backend, 640, device=device, calib_sources=calib_sources)
         self.device = device
+        self.label = f"yolo-{backend}"
 
     def detect(self, frame, conf_thresh=0.3):
         """
@@ -16,19 +20,28 @@ class YOLODetector:
         Returns a list of detections: each is [x1, y1, x2, y2, score, class_id]
         Only returns detections whose class is 'person' (class_id == 0 for COCO).
         """
-        # model expects either numpy or PIL — pass frame directly
-        results = self.model(frame, imgsz=640, conf=conf_thresh, verbose=False)
-        detections = []
-        # results is a list (one item per batch image). We have single image.
-        r = results[0]
-        boxes = r.boxes # Boxes object
-        if boxes is None:
-            return detections
+        return self.detect_batch([frame], conf_thresh)[0]
+
+    def detect_batch(self, frames, conf_thresh=0.3, imgsz=640):
+        """
+        Runs YOLO once on a list of BGR frames (e.g. one per camera).
+        Returns one detection list per frame, in the same order.
+        """
+        if not frames:
+            return []
+        # a list of frames is run as one batch
+        INFERENCE_BATCH.observe(len(frames), detector=self.label)
+        with INFERENCE_SECONDS.time(detector=self.label):
+            results = self.pool.predict(list(frames), imgsz=imgsz, conf=conf_thresh)
+        return [self._parse(dets) for dets in results]
 
-        for box, cls, conf in zip(boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy(), boxes.conf.cpu().numpy()):
-            class_id = int(cls)
-            score = float(conf)
-            x1, y1, x2, y2 = [int(x) for x in box]
+    def _parse(self, dets):
+        # dets: (N, 6) array of [x1, y1, x2, y2, score, class_id] from the backend
+        detections = []
+        for d in dets:
+            class_id = int(d[5])
+            score = float(d[4])
+            x1, y1, x2, y2 = [int(x) for x in d[:4]]
             # COCO class 0 == person (ultralytics default COCO)
             if class_id == 0:
                 detections.append([x1, y1, x2, y2, score, class_id])
@@ -0,0 +1,111 @@
+# zone_raster.py
+# Zones (rectangles and polygons) compiled once into a bitmask label image,
+# so centroid -> zone lookup is a single NumPy gather per frame
+import cv2
+import numpy as np
+
+MAX_ZONES = 64
+
+
+def zone_polygon(zone):
+    """
+    Converts any of the zone formats used in this project to an (K, 2) int32 polygon:
+      {"name": ..., "coords": [(x1, y1), (x2, y2)]}   app.py rectangle
+      {"name": ..., "coords": [(x, y), (x, y), ...]}  polygon (3+ points)
+      [x1, y1, x2, y2]                                 main.py / zone_storage.py
+      [(x1, y1), (x2, y2)]                             2milestone.py
+    """
+    if isinstance(zone, dict):
+        zone = zone.get("coords", [])
+    pts = np.asarray(zone, dtype=np.int32)
+    if pts.ndim == 1 and pts.size == 4:
+        pts = pts.reshape(2, 2)
+    if pts.ndim != 2 or len(pts) < 2:
+        return None
+    if len(pts) == 2:
+        (x1, y1), (x2, y2) = pts.min(axis=0), pts.max(axis=0)
+        pts = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.int32)
+    return pts
+
+
+def zone_name(zone, index):
+    if isinstance(zone, dict):
+        return zone.get("name", f"Zone {index+1}")
+    return f"Zone {index+1}"
+
+
+def bits_to_membership(bits, zones):
+    """ZoneRaster.lookup bitmasks -> (N, zones) boolean membership matrix."""
+    bits = np.asarray(bits).astype(np.uint64)
+    shifts = np.arange(zones, dtype=np.uint64)
+    return ((bits[:, None] >> shifts) & np.uint64(1)).astype(bool)
+
+
+class ZoneRaster:
+    def __init__(self, shape):
+        self.h, self.w = shape[:2]
+        self.key = None
+        self.labels = np.zeros((self.h, self.w), dtype=np.uint8)
+        self.names = []
+        self.polygons = []
+        self.anchors = [] # top-left of each zone's bounding box, for labels
+
+    def compile(self, zones, names=None):
+        """
+        Rasterizes the zones into self.labels, where bit i of a pixel is set when
+        the pixel lies inside zone i (so overlapping zones are fine).
+        Does nothing if the zone set has not changed; returns True if rebuilt.
+        """
+        polygons, zone_names = [], []
+        for i, z in enumerate(zones):
+            poly = zone_polygon(z)
+            if poly is None:
+                continue
+            polygons.append(poly)
+            zone_names.append(names[i] if names else zone_name(z, i))
+
+        key = (tuple(zone_names), tuple(p.tobytes() for p in polygons))
+        if key == self.key:
+            return False
+        if len(polygons) > MAX_ZONES:
+            raise ValueError(f"At most {MAX_ZONES} zones are supported, got {len(polygons)}")
+
+        if len(polygons) <= 8:
+            dtype = np.uint8
+        elif len(polygons) <= 16:
+            dtype = np.uint16
+        elif len(polygons) <= 32:
+            dtype = np.uint32
+        else:
+            dtype = np.uint64
+
+        labels = np.zeros((self.h, self.w), dtype=dtype)
+        mask = np.zeros((self.h, self.w), dtype=np.uint8)
+        for i, poly in enumerate(polygons):
+            mask[:] = 0
+            cv2.fillPoly(mask, [poly], 1)
+            labels[mask.astype(bool)] |= dtype(1 << i)
+
+        self.labels = labels
+        self.names = zone_names
+        self.polygons = polygons
+        self.anchors = [tuple(int(v) for v in p.min(axis=0)) for p in polygons]
+        self.key = key
+        return True
+
+    def lookup(self, points):
+        """Bitmask of the zones containing each (x, y) point; 0 outside every zone."""
+        pts = np.asarray(points, dtype=np.int64).reshape(-1, 2)
+        x, y = pts[:, 0], pts[:, 1]
+        inside = (x >= 0) & (x < self.w) & (y >= 0) & (y < self.h)
+        bits = np.zeros(len(pts), dtype=self.labels.dtype)
+        bits[inside] = self.labels[y[inside], x[inside]]
+        return bits
+
+    def membership(self, points):
+        """(N, Z) boolean matrix: point n is inside zone z."""
+        return bits_to_membership(self.lookup(points), len(self.names))
+
+    def counts(self, points):
+        """Number of points inside each zone, in self.names order."""
+        return self.membership(points).sum(axis=0)